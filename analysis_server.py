@@ -0,0 +1,185 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: A local HTTP server that keeps our main dataframe and school
+#              lists in memory, so repeated questions are answered without
+#              re-reading the datasets. The data is only reloaded when one of
+#              the datasets changes. Start it with:
+#
+#              python analysis_server.py --port 8163
+#
+#              and send JSON requests, for example:
+#
+#              curl -d '{"column": "percent_accepted", "group": "public",
+#                        "min_count": 15}' localhost:8163/fit
+#
+#              GET /schools returns the public and private school lists.
+#              POST /fit returns the best fit line and Pearson R of
+#              graduation rate and a column, and POST /plot returns the plot
+#              as a PNG. Requests can have the keys "column" (required),
+#              "group" ("all", "public", or "private"), "schools" (a list of
+#              school names), "min_count" (the filter_sufficient_data
+#              threshold), "average" (whether to use per-school means),
+#              "title", "ylabel", and "figsize".
+import argparse
+import io
+import json
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import data_cleaning as dc
+import plotting
+from creating_dataframe import create_dataframe
+from regression import fit_lines
+from school_store import get_source_keys
+
+DEFAULT_PORT = 8163
+
+# The data currently held in memory, and the source keys (see
+# school_store.get_source_keys) it was loaded from
+_warm = {"source_keys": None, "data": None, "names": None}
+
+
+def get_warm_data():
+    """
+    Returns a tuple of our main dataframe and the tuple of public and private
+    school lists, loading them again only if a dataset has changed since
+    they were last loaded.
+    """
+    source_keys = get_source_keys()
+    if _warm["source_keys"] != source_keys:
+        _warm["data"] = create_dataframe()
+        _warm["names"] = plotting.get_names_lists()
+        _warm["source_keys"] = source_keys
+    return (_warm["data"], _warm["names"])
+
+
+def get_query_data(request):
+    """
+    Takes in a request dictionary and returns the rows of our main dataframe
+    it asks for, with the columns "Year", "School", "grad_rate", and the
+    requested column (or the per-school means if "average" is true).
+    """
+    data, names = get_warm_data()
+    column = request["column"]
+    group = request.get("group", "all")
+    if group == "public":
+        data = plotting.filter_schools(data, names[0])
+    elif group == "private":
+        data = plotting.filter_schools(data, names[1])
+    elif group != "all":
+        raise ValueError("group must be all, public, or private")
+    if "schools" in request:
+        schools = data["School"].cat
+        is_wanted = dc.get_category_mask(schools.categories,
+                                         request["schools"])
+        codes = schools.codes.to_numpy()
+        data = data[is_wanted[codes] & (codes >= 0)]
+
+    data = plotting.filter_sufficient_data(data, column,
+                                           request.get("min_count", 0))
+    if request.get("average", False):
+        data = plotting.get_mean_data(data, column).dropna()
+    return data
+
+
+def fit(request):
+    """
+    Takes in a request dictionary and returns a dictionary of the slope,
+    intercept, Pearson R coefficient, p-value, and number of points of the
+    best fit line of the requested column against graduation rate.
+    """
+    data = get_query_data(request)
+    result = fit_lines(data, "grad_rate", request["column"]).iloc[0]
+    result = {key: float(value) for key, value in result.items()}
+    result["n"] = int(result["n"])
+    return result
+
+
+def plot(request):
+    """
+    Takes in a request dictionary and returns the bytes of a PNG of the
+    requested plot, drawn the same way as the plots from plotting.py.
+    """
+    data = get_query_data(request)
+    column = request["column"]
+    labels = (request.get("title", "Graduation Rate VS " + column),
+              request.get("ylabel", column))
+    figsize = tuple(request.get("figsize", (8, 8)))
+    with redirect_stdout(io.StringIO()):
+        fig = plotting.draw_generic_graph(data, column, labels, figsize)[0]
+    image = io.BytesIO()
+    fig.savefig(image, format="png")
+    return image.getvalue()
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """
+    Answers the requests sent to the analysis server.
+    """
+    def do_GET(self):
+        """
+        Answers GET /schools with the public and private school lists.
+        """
+        if self.path != "/schools":
+            self.send_json(404, {"error": "unknown path " + self.path})
+            return
+        names = get_warm_data()[1]
+        self.send_json(200, {"public": names[0], "private": names[1]})
+
+    def do_POST(self):
+        """
+        Answers POST /fit and POST /plot requests.
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or "{}")
+            if self.path == "/fit":
+                self.send_json(200, fit(request))
+            elif self.path == "/plot":
+                self.send_body(200, "image/png", plot(request))
+            else:
+                self.send_json(404, {"error": "unknown path " + self.path})
+        except (KeyError, ValueError, IndexError, TypeError) as e:
+            self.send_json(400, {"error": repr(e)})
+
+    def send_json(self, status, value):
+        """
+        Sends a response with the given status code and value as JSON.
+        """
+        self.send_body(status, "application/json",
+                       json.dumps(value).encode())
+
+    def send_body(self, status, content_type, body):
+        """
+        Sends a response with the given status code, content type, and body
+        bytes.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    """
+    This function loads our data and serves requests until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve our analysis.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="port to listen on (default: %(default)s)")
+    args = parser.parse_args()
+
+    plotting.init_plot_style()
+    get_warm_data()
+    server = HTTPServer(("localhost", args.port), AnalysisHandler)
+    print("Serving on http://localhost:" + str(args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
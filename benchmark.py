@@ -0,0 +1,274 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Benchmarks for building our main dataframe and generating our
+#              plots on synthetic datasets of different sizes. Results are
+#              saved as JSON, for example:
+#
+#              python benchmark.py --schools 50 500 --years 20 --stats 6 12
+#
+#              Each run writes its own registry of synthetic datasets: our
+#              six real ones plus extra statistics up to --stats, so every
+#              stage scales with the number of statistics.
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import openpyxl
+
+import creating_dataframe as cd
+import plotting
+
+
+def make_values(rng, num_years, num_schools, num_stats):
+    """
+    Takes in a NumPy random generator, the number of years, the number of
+    schools, and the number of statistics. Returns a dictionary of realistic
+    random year by school arrays for each dataset in the registry, by dataset
+    name, and for each extra statistic ("extra_0" and so on) past the six in
+    the registry.
+    """
+    shape = (num_years, num_schools)
+    applicants = rng.integers(1000, 20000, shape).astype(float)
+    admitted = np.round(applicants * rng.uniform(0.3, 0.95, shape))
+    grad_rate = np.round(rng.uniform(20, 95, shape), 2)
+    population = rng.integers(1000, 40000, shape).astype(float)
+    fin_aid = np.round(population * rng.uniform(0.05, 0.6, shape))
+    half = num_schools // 2
+    values = {"applicants": applicants, "admitted": admitted,
+              "grad_rate": grad_rate, "population": population,
+              "fin_aid_public": fin_aid[:, :half],
+              "fin_aid_private": fin_aid[:, half:]}
+    for i in range(num_stats - len(values)):
+        values["extra_" + str(i)] = np.round(rng.uniform(0, 100, shape), 2)
+    return values
+
+
+def get_benchmark_datasets(num_stats):
+    """
+    Takes in the number of statistics and returns the list of datasets to
+    benchmark: the ones in our registry, followed by extra statistics named
+    "extra_0" and so on until there are num_stats of them.
+    """
+    datasets = cd.load_registry()
+    for i in range(num_stats - len(datasets)):
+        datasets.append({"name": "extra_" + str(i),
+                         "stat": "extra_" + str(i),
+                         "file": "datasets/extra_" + str(i) + ".xlsx",
+                         "header": 2, "prefix_len": 2, "suffix_len": 2,
+                         "role": "statistic"})
+    return datasets
+
+
+def write_registry(datasets, registry_file):
+    """
+    Takes in a list of datasets and a file name, and writes the datasets to
+    the file as a registry in the format of datasets.toml.
+    """
+    with open(registry_file, "w") as f:
+        for dataset in datasets:
+            f.write("[[dataset]]\n")
+            for key, value in dataset.items():
+                # JSON strings and numbers are also valid TOML
+                f.write(key + " = " + json.dumps(value) + "\n")
+            f.write("\n")
+
+
+def write_workbook(dataset, schools, years, values):
+    """
+    Takes in a dataset from the registry, the list of school names, the list
+    of years, and a year by school array of values, and writes the dataset's
+    workbook laid out like our real datasets.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for _ in range(dataset["header"]):
+        sheet.append(["Synthetic dataset for benchmarking"])
+    prefix = " ".join("Prefix" for _ in range(dataset["prefix_len"]))
+    suffix = " ".join("suffix" for _ in range(dataset["suffix_len"]))
+    sheet.append(["Time"] + [prefix + " " + school + " " + suffix
+                             for school in schools])
+    for i, year in enumerate(years):
+        sheet.append([year] + list(values[i]))
+    workbook.save(dataset["file"])
+
+
+def make_datasets(num_schools, num_years, num_stats, seed=0):
+    """
+    Takes in the number of schools, years, and statistics, and a random seed.
+    Writes a synthetic workbook for each of the num_stats datasets from
+    get_benchmark_datasets and a registry of them, relative to the current
+    directory, and returns the file name of the registry.
+    """
+    rng = np.random.default_rng(seed)
+    schools = ["Synthetic School " + str(i) for i in range(num_schools)]
+    years = list(range(2020 - num_years, 2020))
+    datasets = get_benchmark_datasets(num_stats)
+    all_values = make_values(rng, num_years, num_schools, len(datasets))
+    half = num_schools // 2
+    school_lists = {"public_schools": schools[:half],
+                    "private_schools": schools[half:]}
+
+    for dataset in datasets:
+        if os.path.dirname(dataset["file"]) != "":
+            os.makedirs(os.path.dirname(dataset["file"]), exist_ok=True)
+        write_workbook(dataset,
+                       school_lists.get(dataset["role"], schools), years,
+                       all_values[dataset["name"]])
+    registry_file = "datasets.toml"
+    write_registry(datasets, registry_file)
+    return registry_file
+
+
+def measure(results, stage, function, *args):
+    """
+    Takes in the list of results, the name of a stage, and a function with
+    its arguments. Calls the function, adds its wall time and peak memory use
+    to results, and returns what the function returned.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results.append({"stage": stage, "seconds": seconds, "peak_bytes": peak})
+    return result
+
+
+def clear_workbook_caches():
+    """
+    Forgets every parsed workbook, in this process and on disk, so the next
+    read parses the workbooks again.
+    """
+    cd._loaded_workbooks.clear()
+    shutil.rmtree(cd.CACHE_DIR, ignore_errors=True)
+
+
+def run_benchmark(num_schools, num_years, num_stats):
+    """
+    Takes in the number of schools, years, and statistics, and times every
+    stage of building our main dataframe and generating our plots on
+    synthetic datasets of that size. Returns a list of results.
+    """
+    results = list()
+    start_dir = os.getcwd()
+    registry = cd.DATASETS
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            cd.DATASETS = cd.load_registry(make_datasets(num_schools,
+                                                         num_years,
+                                                         num_stats))
+            clear_workbook_caches()
+            # Parse in this process, so tracemalloc sees the parsing memory
+            raw = measure(results, "read_data", cd.read_data, 1)
+            measure(results, "read_data_cached", cd.read_data)
+            names = measure(results, "get_names", cd.get_names, raw)
+            measure(results, "get_dictionaries", cd.get_dictionaries, raw,
+                    names)
+            long_dfs = measure(results, "get_long_dataframes",
+                               cd.get_long_dataframes, raw, names)
+            measure(results, "join_statistics", cd.join_statistics,
+                    [df.rename(columns={d["stat"]: d["name"]})
+                     for df, d in zip(long_dfs, cd.get_datasets())])
+
+            # The full build parses every workbook again (in worker
+            # processes, so peak_bytes leaves out the parsing), and the warm
+            # build reuses the parsed workbooks
+            clear_workbook_caches()
+            measure(results, "create_dataframe", cd.create_dataframe)
+            data = measure(results, "create_dataframe_warm",
+                           cd.create_dataframe)
+            plot_data = measure(results, "filter_schools", get_plot_data,
+                                data)
+            fin_aid_data = measure(results, "get_fin_aid_data",
+                                   plotting.get_fin_aid_data, data)
+            plot_data.append(fin_aid_data)
+            plot_data += [plotting.get_fin_aid_data(d) for d in plot_data[1:3]]
+
+            plotting.init_plot_style()
+            for job in get_plot_jobs(plot_data):
+                measure(results, job[0].__name__, plotting.run_plot_job, job)
+        finally:
+            os.chdir(start_dir)
+            cd.DATASETS = registry
+            cd._loaded_workbooks.clear()
+
+    for result in results:
+        result.update({"schools": num_schools, "years": num_years,
+                       "stats": num_stats})
+    return results
+
+
+def get_plot_data(data):
+    """
+    Takes in our main dataframe and returns a list of all, public, and
+    private school data.
+    """
+    names = plotting.get_names_lists()
+    return [data, plotting.filter_schools(data, names[0]),
+            plotting.filter_schools(data, names[1])]
+
+
+def get_plot_jobs(plot_data):
+    """
+    Takes in a list of all, public, and private school data followed by all,
+    public, and private financial aid data, and returns the plot jobs for
+    every plot_ function, the same as plotting.main.
+    """
+    data, public, private, fin_aid, public_fin_aid, private_fin_aid = \
+        plot_data
+    return [(plotting.plot_grad_rate_vs_percent_accepted, data),
+            (plotting.plot_grad_rate_vs_percent_accepted_public, public),
+            (plotting.plot_grad_rate_vs_percent_accepted_private, private),
+            (plotting.plot_average_grad_rate_vs_percent_accepted, data),
+            (plotting.plot_average_grad_rate_vs_percent_accepted_public,
+             public),
+            (plotting.plot_average_grad_rate_vs_percent_accepted_private,
+             private),
+            (plotting.plot_grad_rate_vs_financial, fin_aid),
+            (plotting.plot_grad_rate_vs_financial_public, public_fin_aid),
+            (plotting.plot_grad_rate_vs_financial_private, private_fin_aid),
+            (plotting.plot_average_grad_rate_vs_financial, fin_aid),
+            (plotting.plot_average_grad_rate_vs_financial_public,
+             public_fin_aid),
+            (plotting.plot_average_grad_rate_vs_financial_private,
+             private_fin_aid)]
+
+
+def main():
+    """
+    This function runs the benchmark for every combination of the sizes given
+    on the command line and saves the results as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark our pipeline.")
+    parser.add_argument("--schools", type=int, nargs="+", default=[50],
+                        help="numbers of schools to benchmark")
+    parser.add_argument("--years", type=int, nargs="+", default=[20],
+                        help="numbers of years to benchmark (at least 15)")
+    parser.add_argument("--stats", type=int, nargs="+", default=[6],
+                        help="numbers of statistics, each its own workbook "
+                             "(at least 6)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json",
+                        help="file to save the results to")
+    args = parser.parse_args()
+
+    results = list()
+    for num_schools in args.schools:
+        for num_years in args.years:
+            for num_stats in args.stats:
+                print("Benchmarking", num_schools, "schools,", num_years,
+                      "years,", num_stats, "statistics")
+                results += run_benchmark(num_schools, num_years, num_stats)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Saved results to", args.output)
+
+
+if __name__ == "__main__":
+    main()
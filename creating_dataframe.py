@@ -1,77 +1,448 @@
 # Name: Adam Klingler and Kayla Perez
 # Description: Helper functions for creating our main dataframe.
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import tomllib
+except ModuleNotFoundError:
+    # tomllib is only built in from Python 3.11, and tomli is the same module
+    import tomli as tomllib
+
+import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
 import data_cleaning as dc
+from profiling import stage
+
+CACHE_DIR = ".dataset_cache"
+CHUNK_SIZE = 1000
+REGISTRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "datasets.toml")
+
+# Parsed workbooks for this process, keyed by (path, mtime, size)
+_loaded_workbooks = dict()
+
+
+def load_registry(registry_file=REGISTRY_FILE):
+    """
+    Takes in the file name of a dataset registry and returns its list of
+    datasets, each a dictionary with the keys described in datasets.toml.
+    """
+    with open(registry_file, "rb") as f:
+        datasets = tomllib.load(f)["dataset"]
+    for dataset in datasets:
+        dataset.setdefault("stat", dataset["name"])
+    return datasets
+
+
+DATASETS = load_registry()
+
+
+def get_datasets(names=None, role=None):
+    """
+    Returns the list of datasets in the registry, in registry order. If a
+    list of names is given, only those datasets are returned, and if a role
+    is given, only the datasets with that role.
+    """
+    datasets = DATASETS
+    if names is not None:
+        datasets = [d for d in datasets if d["name"] in names]
+    if role is not None:
+        datasets = [d for d in datasets if d["role"] == role]
+    return datasets
+
+
+def get_file_key(file_name):
+    """
+    Takes in a file name and returns a tuple of its absolute path,
+    modification time, and size, which changes whenever the file does.
+    """
+    stat = os.stat(file_name)
+    return (os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size)
+
+
+def get_cache_file(file_key):
+    """
+    Takes in a file key from get_file_key and returns the path of the on-disk
+    cache file for that version of the file.
+    """
+    digest = hashlib.sha1(repr(file_key).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, digest + ".pkl")
+
+
+def parse_excel(file_name, header=2):
+    """
+    Takes in the file name of a workbook and the header row, and returns the
+    workbook as a DataFrame. The parsed DataFrame is saved to CACHE_DIR, and
+    read from there instead of parsing the workbook again until the workbook
+    changes.
+    """
+    cache_file = get_cache_file(get_file_key(file_name) + (header,))
+    if os.path.exists(cache_file):
+        return pd.read_pickle(cache_file)
+
+    df = pd.read_excel(file_name, header=header)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so other processes never read a
+        # partly written cache file
+        temp_file = cache_file + "." + str(os.getpid())
+        df.to_pickle(temp_file)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        # The on-disk cache is only an optimization
+        pass
+    return df
+
+
+def needs_parsing(file_name, header=2):
+    """
+    Takes in the file name of a workbook and the header row, and returns
+    whether load_excel would have to parse it with openpyxl (because it is in
+    neither the per-process nor the on-disk cache).
+    """
+    file_key = get_file_key(file_name) + (header,)
+    return file_key not in _loaded_workbooks and \
+        not os.path.exists(get_cache_file(file_key))
+
+
+@stage
+def load_excel(file_name, header=2):
+    """
+    Takes in the file name of a workbook and the header row, and returns the
+    workbook as a DataFrame. Each workbook is only parsed once per process,
+    and the parsed DataFrame is also saved to CACHE_DIR so later runs skip
+    parsing until the workbook changes. The returned DataFrame is shared
+    between callers, so it should not be modified.
+    """
+    file_key = get_file_key(file_name) + (header,)
+    if file_key not in _loaded_workbooks:
+        _loaded_workbooks[file_key] = parse_excel(file_name, header)
+    return _loaded_workbooks[file_key]
+
+
+@stage
+def read_data(workers=None, datasets=None):
+    """
+    Reads the given list of datasets from the registry (all of them if None)
+    into Pandas DataFrames and returns them all as a tuple. Workbooks that
+    have to be parsed are parsed at the same time in up to workers processes
+    (None for one per CPU).
+    """
+    if datasets is None:
+        datasets = get_datasets()
+    to_parse = [d for d in datasets if needs_parsing(d["file"], d["header"])]
+    if len(to_parse) > 1 and workers != 1:
+        max_workers = workers or min(len(to_parse), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            parsed = pool.map(parse_excel, [d["file"] for d in to_parse],
+                              [d["header"] for d in to_parse])
+            for dataset, df in zip(to_parse, parsed):
+                file_key = get_file_key(dataset["file"]) + (dataset["header"],)
+                _loaded_workbooks[file_key] = df
+    return tuple(load_excel(d["file"], d["header"]) for d in datasets)
+
+
+def convert_cell(value):
+    """
+    Takes in a cell value read by openpyxl and returns it the way
+    pd.read_excel would, with whole-number floats turned into ints.
+    """
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_sheet_chunks(file_name, chunk_size=CHUNK_SIZE, header=2):
+    """
+    Takes in the file name of a workbook or CSV export, the chunk size, and
+    the header row. Yields the rows below the header as DataFrames of at most
+    chunk_size rows, reading the file row by row so that only one chunk is
+    held in memory at a time.
+    """
+    if file_name.endswith(".csv"):
+        yield from pd.read_csv(file_name, header=header, chunksize=chunk_size)
+        return
+
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_name, read_only=True,
+                                      data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # Our exports don't record their size, so openpyxl has to find it
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(min_row=header + 1, values_only=True)
+        columns = list(next(rows))
+        chunk = list()
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            chunk.append([convert_cell(value) for value in row])
+            if len(chunk) == chunk_size:
+                yield TextParser(chunk, names=columns).read()
+                chunk = list()
+        if len(chunk) > 0:
+            yield TextParser(chunk, names=columns).read()
+    finally:
+        workbook.close()
+
+
+@stage
+def stream_school_frame(file_name, prefix_len, suffix_len, stat_name,
+                        chunk_size=CHUNK_SIZE, header=2):
+    """
+    Takes in the file name of a workbook or CSV export, the prefix and suffix
+    lengths of its school names, the name of the statistic, the chunk size,
+    and the header row. Returns the same long DataFrame as get_school_frame,
+    but reshapes the file one chunk at a time instead of loading the whole
+    sheet.
+    """
+    names = None
+    long_chunks = list()
+    for chunk in iter_sheet_chunks(file_name, chunk_size, header):
+        if names is None:
+            names = dc.get_school_names(chunk, prefix_len, suffix_len)
+        long_chunks.append(dc.get_school_frame(chunk, names, stat_name))
+    if len(long_chunks) == 0:
+        return pd.DataFrame(columns=["Year", "School", stat_name])
+    return pd.concat(long_chunks, ignore_index=True)
 
 
-def read_data():
+@stage
+def stream_long_dataframes(chunk_size=CHUNK_SIZE, datasets=None):
     """
-    Reads all of the datasets into Pandas DataFrames and returns them all
-    as a tuple.
+    Takes in the chunk size and the list of datasets (all of them if None),
+    and returns the same tuple of long School/Year DataFrames as
+    get_long_dataframes, reading each dataset in chunks.
     """
-    applicants = pd.read_excel("datasets/total_applicants.xlsx", header=2)
-    admitted = pd.read_excel("datasets/total_admitted.xlsx", header=2)
-    grad_rate = pd.read_excel("datasets/graduation_rates.xlsx", header=2)
-    student_pop = pd.read_excel("datasets/student_population.xlsx", header=2)
-    public_fin = pd.read_excel("datasets/financial_aid_public.xlsx", header=2)
-    private_fin = pd.read_excel("datasets/financial_aid_private.xlsx",
-                                header=2)
-    return (applicants, admitted, grad_rate, student_pop, public_fin,
-            private_fin)
+    if datasets is None:
+        datasets = get_datasets()
+    return tuple(stream_school_frame(d["file"], d["prefix_len"],
+                                     d["suffix_len"], d["stat"], chunk_size,
+                                     d["header"]) for d in datasets)
 
 
-def get_names(dataframes):
+@stage
+def get_names(dataframes, datasets=None):
     """
-    Takes in the tuple of raw DataFrames. Returns a new tuple with each list of
+    Takes in the tuple of raw DataFrames and the list of datasets they were
+    read from (all of them if None). Returns a new tuple with each list of
     schools retrieved from the raw DataFrames.
     """
-    applicants = dc.get_school_names(dataframes[0], 3, 2)
-    admitted = dc.get_school_names(dataframes[1], 3, 2)
-    grad_rate = dc.get_school_names(dataframes[2], 2, 6)
-    student_pop = dc.get_school_names(dataframes[3], 2, 6)
-    public_fin = dc.get_school_names(dataframes[4], 8, 33)
-    private_fin = dc.get_school_names(dataframes[5], 8, 21)
-    return (applicants, admitted, grad_rate, student_pop, public_fin,
-            private_fin)
+    if datasets is None:
+        datasets = get_datasets()
+    return tuple(dc.get_school_names(df, d["prefix_len"], d["suffix_len"])
+                 for df, d in zip(dataframes, datasets))
+
+
+@stage
+def get_long_dataframes(dataframes, names, datasets=None):
+    """
+    Takes in the tuple of raw DataFrames, the tuple of school names, and the
+    list of datasets they were read from (all of them if None). Returns a
+    tuple of long School/Year DataFrames for each DataFrame.
+    """
+    if datasets is None:
+        datasets = get_datasets()
+    return tuple(dc.get_school_frame(df, school_names, d["stat"])
+                 for df, school_names, d in zip(dataframes, names, datasets))
 
 
-def get_dictionaries(dataframes, names):
+@stage
+def get_dictionaries(dataframes, names, datasets=None):
     """
-    Takes in the tuple of raw DataFrames and the tuple of school names. Returns
-    a tuple of dictionaries for each DataFrame.
+    Takes in the tuple of raw DataFrames, the tuple of school names, and the
+    list of datasets they were read from (all of them if None). Returns a
+    tuple of dictionaries for each DataFrame.
     """
-    applicants = dc.get_school_data(dataframes[0], names[0], "applicants")
-    admitted = dc.get_school_data(dataframes[1], names[1], "admitted")
-    grad_rate = dc.get_school_data(dataframes[2], names[2], "grad_rate")
-    student_pop = dc.get_school_data(dataframes[3], names[3], "population")
-    public_fin = dc.get_school_data(dataframes[4], names[4], "fin_aid")
-    private_fin = dc.get_school_data(dataframes[5], names[5], "fin_aid")
-    return (applicants, admitted, grad_rate, student_pop, public_fin,
-            private_fin)
+    long_dfs = get_long_dataframes(dataframes, names, datasets)
+    return tuple(df.to_dict("records") for df in long_dfs)
+
+
+@stage
+def get_school_lists(role):
+    """
+    Takes in a dataset role (such as "public_schools") and returns the list
+    of schools in the datasets with that role, only reading those datasets.
+    """
+    datasets = get_datasets(role=role)
+    names = get_names(read_data(datasets=datasets), datasets)
+    return [school for school_names in names for school in school_names]
+
+
+@stage
+def join_statistics(long_dfs):
+    """
+    Takes in a list of long DataFrames, each with "School" and "Year" columns
+    and one column per statistic. Returns a single DataFrame with a row for
+    every (School, Year) pair found in any of them, sorted by school and then
+    year, and a column for each statistic in the order given. "School" is
+    categorical, with the schools in alphabetical order as its categories.
+    """
+    indexed = list()
+    for df in long_dfs:
+        # Join on integer school IDs rather than on the names themselves
+        index = pd.MultiIndex.from_arrays(
+            [dc.get_school_id_column(df["School"]), df["Year"]],
+            names=["School ID", "Year"])
+        stats = df.drop(columns=["School", "Year"])
+        indexed.append(stats.set_axis(index, axis=0))
+
+    joined = pd.concat(indexed, axis=1, join="outer").reset_index()
+    school_ids = joined.pop("School ID").to_numpy()
+
+    # Sort by the alphabetical rank of each school, then by year
+    unique_ids = np.unique(school_ids)
+    name_order = np.argsort(dc.get_names_from_ids(unique_ids))
+    ranks = np.empty(unique_ids.max() + 1 if len(unique_ids) > 0 else 0,
+                     dtype=np.int64)
+    ranks[unique_ids[name_order]] = np.arange(len(unique_ids))
+    row_order = np.lexsort((joined["Year"].to_numpy(), ranks[school_ids]))
+
+    # Keep the join's integer keys as the codes of a categorical "School"
+    # column, with the ranks as codes so the categories are sorted
+    joined = joined.iloc[row_order].reset_index(drop=True)
+    names = pd.Index(dc.get_names_from_ids(unique_ids[name_order]),
+                     dtype=str)
+    schools = pd.Categorical.from_codes(ranks[school_ids[row_order]], names)
+    joined.insert(1, "School", schools)
+    return joined
 
 
-def create_dataframe():
+@stage
+def create_dataframe(streaming=False, chunk_size=CHUNK_SIZE, names=None):
     """
     Creates and returns a new DataFrame consisting of all of our orignial
-    datasets.
-    """
-    raw_dataframes = read_data()
-    school_names = get_names(raw_dataframes)
-    dictionaries = get_dictionaries(raw_dataframes, school_names)
-
-    applicant_df = pd.DataFrame(dictionaries[0])
-    admitted_df = pd.DataFrame(dictionaries[1])
-    grad_df = pd.DataFrame(dictionaries[2])
-    pop_df = pd.DataFrame(dictionaries[3])
-    public_df = pd.DataFrame(dictionaries[4])
-    private_df = pd.DataFrame(dictionaries[5])
-
-    df = applicant_df.copy()
-    df = df.merge(grad_df, how="outer", on=["School", "Year"])
-    df = df.merge(pop_df, how="outer", on=["School", "Year"])
-    df = df.merge(admitted_df, how="outer", on=["School", "Year"])
-    df = df.merge(private_df, how="outer", on=["School", "Year"])
-    df = df.merge(public_df, how="outer", on=["School", "Year"],
-                  suffixes=["_private", "_public"])
-    df["percent_accepted"] = (df["admitted"] / df["applicants"]) * 100
-    return df
+    datasets, or only the datasets in the given list of names, with a column
+    for each in registry order. If streaming is True, the datasets are read
+    chunk_size rows at a time instead of being loaded whole, which keeps
+    memory use down for very large exports.
+    """
+    datasets = get_datasets(names)
+    if streaming:
+        long_dataframes = stream_long_dataframes(chunk_size, datasets)
+    else:
+        raw_dataframes = read_data(datasets=datasets)
+        school_names = get_names(raw_dataframes, datasets)
+        long_dataframes = get_long_dataframes(raw_dataframes, school_names,
+                                              datasets)
+
+    long_dataframes = [df.rename(columns={d["stat"]: d["name"]})
+                       for df, d in zip(long_dataframes, datasets)]
+    df = join_statistics(long_dataframes)
+    add_derived_columns(df)
+    return dc.optimize_dtypes(df)
+
+
+def add_derived_columns(df):
+    """
+    Takes in a merged DataFrame and adds the columns computed from its
+    statistics: "percent_accepted" if it has "admitted" and "applicants".
+    The columns are replaced if they are already there.
+    """
+    if "admitted" in df.columns and "applicants" in df.columns:
+        admitted = df["admitted"].astype(float)
+        df["percent_accepted"] = (admitted / df["applicants"]) * 100
+
+
+@stage
+def update_dataframe(data, new_rows):
+    """
+    Takes in a merged DataFrame data (as returned by create_dataframe, so
+    sorted by school and then year) and a DataFrame new_rows with "School"
+    and "Year" columns and some of the statistic columns, for example a new
+    year of our datasets. Returns a tuple of the updated merged DataFrame,
+    the rows of data that were changed (as they were), and the changed and
+    added rows (as they are now).
+
+    Rows are matched on (School, Year). Values in new_rows replace the ones
+    in data, missing values in new_rows leave them as they were, and rows
+    for new pairs are added. Changed rows are written into a copy of data,
+    and added rows are inserted where they belong, so the table is never
+    sorted again. Only the changed and added rows are cast and have their
+    derived columns computed, and a column is only cast to a wider dtype
+    when a new value does not fit in it. data is not modified.
+    """
+    keys = ["School", "Year"]
+    unknown = set(new_rows.columns) - set(data.columns)
+    if len(unknown) > 0:
+        raise ValueError("Unknown columns: " + ", ".join(sorted(unknown)))
+    new = new_rows.astype({"School": str}).drop_duplicates(keys, keep="last")
+    index = pd.MultiIndex.from_arrays([data["School"], data["Year"]])
+    found = index.get_indexer(pd.MultiIndex.from_arrays([new["School"],
+                                                         new["Year"]]))
+    old_rows = data.iloc[np.sort(found[found >= 0])]
+
+    # Every value of the changed and added rows, with the new values
+    # replacing the old ones
+    value_columns = [c for c in data.columns if c not in keys]
+    old_values = old_rows.astype({"School": str}).set_index(keys)
+    changed = new.set_index(keys).astype(float).combine_first(
+        old_values[value_columns].astype(float))
+    changed = changed.reindex(columns=value_columns)
+    add_derived_columns(changed)
+    changed = changed.reset_index()
+
+    result = data.copy()
+    if not isinstance(result["School"].dtype, pd.CategoricalDtype):
+        result["School"] = result["School"].astype("category")
+    schools = set(result["School"].cat.categories)
+    if not set(changed["School"]).issubset(schools):
+        # Keep the categories sorted, so their codes sort the rows by name
+        schools = sorted(schools | set(changed["School"]))
+        result["School"] = result["School"].cat.set_categories(schools)
+    for column in ["Year"] + value_columns:
+        values = changed[column].astype(float)
+        if not dc.fits_dtype(values, result[column].dtype):
+            widened = pd.concat([result[column].astype(float), values])
+            dtype = dc.optimize_column(column, widened).dtype
+            result[column] = result[column].astype(dtype)
+    rows = pd.DataFrame({column: changed[column].astype(result[column].dtype)
+                         for column in data.columns})
+
+    found = index.get_indexer(pd.MultiIndex.from_arrays([changed["School"],
+                                                         changed["Year"]]))
+    is_added = found < 0
+    for column in value_columns:
+        result.iloc[found[~is_added], result.columns.get_loc(column)] = \
+            rows[column].array[~is_added]
+    changed_positions = found[~is_added]
+
+    if is_added.any():
+        added = rows[is_added]
+        row_keys = get_row_keys(result["School"], result["Year"],
+                                added["Year"])
+        added_keys = get_row_keys(added["School"], added["Year"],
+                                  result["Year"])
+        added_order = np.argsort(added_keys, kind="stable")
+        insert_at = np.searchsorted(row_keys, added_keys[added_order])
+        order = np.insert(np.arange(len(result)), insert_at,
+                          len(result) + added_order)
+        result = pd.concat([result, added], ignore_index=True)
+        result = result.take(order).reset_index(drop=True)
+
+        # Where each row of the concatenated table ended up
+        new_positions = np.empty(len(order), dtype=np.int64)
+        new_positions[order] = np.arange(len(order))
+        changed_positions = np.concatenate([
+            new_positions[changed_positions],
+            new_positions[len(data) + np.arange(len(added))]])
+
+    return (result, old_rows, result.iloc[np.sort(changed_positions)])
+
+
+def get_row_keys(schools, years, other_years):
+    """
+    Takes in a categorical "School" column with sorted categories, its "Year"
+    column, and the "Year" column of the rows it will be compared with.
+    Returns a NumPy array of an integer for each row that sorts the same way
+    as (School, Year).
+    """
+    years = years.to_numpy(dtype=np.int64)
+    all_years = np.concatenate([years, other_years.to_numpy(dtype=np.int64)])
+    first_year = all_years.min()
+    span = all_years.max() - first_year + 1
+    codes = schools.cat.codes.to_numpy(dtype=np.int64)
+    return codes * span + (years - first_year)
@@ -1,7 +1,13 @@
 import math
 
+import numpy as np
 import pandas as pd
 
+# Largest difference allowed between two floats that are checked
+TOLERANCE = 0.001
+# Number of differing cells to show when two DataFrames do not match
+MAX_DIFF_CELLS = 10
+
 
 def parse(file_name):
     """
@@ -19,22 +25,37 @@ def check_approx_equals(expected, received):
     not they match (True if they do, False otherwise).
     If the argument is a float, will do an approximate check.
     If the arugment is a data structure will do an approximate check
-    on all of its contents.
+    on all of its contents. DataFrames, Series, and NumPy arrays are
+    checked a whole column at a time, and missing values in them match each
+    other.
     """
     try:
-        if type(expected) == dict:
+        if isinstance(expected, pd.DataFrame):
+            return isinstance(received, pd.DataFrame) and \
+                get_frame_problem(expected, received) is None and \
+                all(get_matches(expected[c], received[c]).all()
+                    for c in expected.columns)
+        elif isinstance(expected, pd.Series):
+            return isinstance(received, pd.Series) and \
+                expected.index.equals(received.index) and \
+                get_matches(expected, received).all()
+        elif isinstance(expected, np.ndarray):
+            received = np.asarray(received)
+            return expected.shape == received.shape and \
+                get_matches(expected.ravel(), received.ravel()).all()
+        elif type(expected) == dict:
             # first check that keys match, then check that the
             # values approximately match
             return expected.keys() == received.keys() and \
-                all([check_approx_equals(expected[k], received[k])
-                    for k in expected.keys()])
+                all(check_approx_equals(expected[k], received[k])
+                    for k in expected.keys())
         elif type(expected) == list or type(expected) == set:
             # Checks both lists/sets contain the same values
             return len(expected) == len(received) and \
-                all([check_approx_equals(v1, v2)
-                    for v1, v2 in zip(expected, received)])
+                all(check_approx_equals(v1, v2)
+                    for v1, v2 in zip(expected, received))
         elif type(expected) == float:
-            return math.isclose(expected, received, abs_tol=0.001)
+            return math.isclose(expected, received, abs_tol=TOLERANCE)
         else:
             return expected == received
     except Exception as e:
@@ -42,12 +63,95 @@ def check_approx_equals(expected, received):
         return False
 
 
+def get_matches(expected, received):
+    """
+    Takes in two Series or 1-D arrays of the same length and returns a NumPy
+    boolean array of whether each pair of values matches. Numbers are
+    checked approximately, and missing values match each other.
+    """
+    expected = pd.Series(expected)
+    received = pd.Series(received)
+    if is_number_series(expected) and is_number_series(received):
+        return np.isclose(expected.to_numpy(dtype=float, na_value=np.nan),
+                          received.to_numpy(dtype=float, na_value=np.nan),
+                          rtol=0, atol=TOLERANCE, equal_nan=True)
+    both_missing = (expected.isna() & received.isna()).to_numpy()
+    equal = expected.to_numpy(dtype=object) == received.to_numpy(dtype=object)
+    return both_missing | equal
+
+
+def is_number_series(values):
+    """
+    Returns whether the Series values holds numbers (not booleans).
+    """
+    return pd.api.types.is_numeric_dtype(values) and \
+        not pd.api.types.is_bool_dtype(values)
+
+
+def get_frame_problem(expected, received):
+    """
+    Takes in two DataFrames and returns a string describing how their
+    columns, number of rows, or index differ, or None if they have the same
+    structure.
+    """
+    if list(expected.columns) != list(received.columns):
+        return (f'columns differ: expected {list(expected.columns)}, '
+                f'received {list(received.columns)}')
+    if len(expected) != len(received):
+        return (f'row counts differ: expected {len(expected)}, '
+                f'received {len(received)}')
+    if not expected.index.equals(received.index):
+        return 'indexes differ'
+    return None
+
+
+def get_frame_diff(expected, received, limit=MAX_DIFF_CELLS):
+    """
+    Takes in two DataFrames and returns a compact description of how they
+    differ: their structure, or the number of cells that do not match and
+    the first limit of them. Cells are labelled by (School, Year) when both
+    DataFrames have those columns, and by index otherwise.
+    """
+    problem = get_frame_problem(expected, received)
+    if problem is not None:
+        return problem
+
+    labelled = 'School' in expected.columns and 'Year' in expected.columns
+    lines = list()
+    num_differing = 0
+    for column in expected.columns:
+        rows = np.flatnonzero(~get_matches(expected[column],
+                                           received[column]))
+        num_differing += len(rows)
+        rows = rows[:max(limit - len(lines), 0)]
+        expected_values = expected[column].iloc[rows].astype(object)
+        received_values = received[column].iloc[rows].astype(object)
+        for i, row in enumerate(rows):
+            if labelled:
+                label = (f'({expected["School"].iat[row]}, '
+                         f'{expected["Year"].iat[row]})')
+            else:
+                label = f'[{expected.index[row]!r}]'
+            lines.append(f'  {label} {column}: expected '
+                         f'{expected_values.iat[i]!r}, received '
+                         f'{received_values.iat[i]!r}')
+    if num_differing > len(lines):
+        lines.append(f'  ... and {num_differing - len(lines)} more')
+    return '\n'.join([f'{num_differing} cells differ:'] + lines)
+
+
 def assert_equals(expected, received):
     """
     Checks received against expected, throws an AssertionError
     if they don't match. If the argument is a float, will do an approximate
     check. If the arugment is a data structure will do an approximate check
-    on all of its contents.
+    on all of its contents. If both are DataFrames, the error only describes
+    the cells that differ.
     """
+    if isinstance(expected, pd.DataFrame) and \
+            isinstance(received, pd.DataFrame):
+        assert check_approx_equals(expected, received), \
+            'Failed: ' + get_frame_diff(expected, received)
+        return
     assert check_approx_equals(expected, received), \
         f'Failed: Expected {expected}, but received {received}'
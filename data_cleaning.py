@@ -1,7 +1,32 @@
 # Name: Adam Klingler and Kayla Perez
 # Description: Helper functions for cleaning the data for the main dataframe.
+import sys
+from functools import lru_cache
 
+import numpy as np
+import pandas as pd
+from profiling import stage
 
+# Every school name given an ID so far, in order of their IDs
+_id_school_names = list()
+# The school ID of each name in _id_school_names
+_school_ids = dict()
+
+
+@lru_cache(maxsize=None)
+def parse_school_name(col_name, prefix_len, suffix_len):
+    """
+    Takes a column name from a school data DataFrame, prefix length, and
+    suffix length. Returns the school name in the column name. Each column
+    name is only parsed once, and equal school names are the same string
+    object.
+    """
+    words = col_name.split()
+    school_list = words[prefix_len:len(words) - suffix_len]
+    return sys.intern(" ".join(school_list))
+
+
+@stage
 def get_school_names(df, prefix_len, suffix_len):
     """
     Takes a school data DataFrame, prefix length, and suffix length.
@@ -10,26 +35,155 @@ def get_school_names(df, prefix_len, suffix_len):
     col_names = list(df.columns)
     schools = list()
     for name in col_names[1:]:
-        words = name.split()
-        school_list = words[prefix_len:len(words) - suffix_len]
-        school = " ".join(school_list)
-        schools.append(school)
+        schools.append(parse_school_name(name, prefix_len, suffix_len))
     return schools
 
 
+def get_school_ids(school_names):
+    """
+    Takes a list of school names and returns a NumPy array of their
+    integer school IDs. Names that have not been seen before are given the
+    next unused ID, so a school's ID never changes while the program runs.
+    """
+    ids = np.empty(len(school_names), dtype=np.int64)
+    for i, name in enumerate(school_names):
+        if name not in _school_ids:
+            _school_ids[name] = len(_id_school_names)
+            _id_school_names.append(name)
+        ids[i] = _school_ids[name]
+    return ids
+
+
+def get_school_id_column(schools):
+    """
+    Takes a column of school names with repeats (such as the "School" column
+    of a long DataFrame) and returns a NumPy array of the school ID of each
+    row. Each unique name is only looked up once.
+    """
+    codes, unique_names = pd.factorize(np.asarray(schools, dtype=object))
+    return get_school_ids(list(unique_names))[codes]
+
+
+def get_names_from_ids(school_ids):
+    """
+    Takes an array of school IDs and returns a NumPy array of the school name
+    for each of them.
+    """
+    return np.asarray(_id_school_names, dtype=object)[school_ids]
+
+
+def get_category_mask(categories, school_names):
+    """
+    Takes the categories of a categorical "School" column and a list of
+    school names and returns a NumPy boolean array of whether each category
+    is one of those schools. Names that are not categories are ignored.
+    """
+    is_wanted = np.zeros(len(categories), dtype=bool)
+    codes = categories.get_indexer(list(school_names))
+    is_wanted[codes[codes >= 0]] = True
+    return is_wanted
+
+
+@stage
+def get_school_frame(df, school_names, stat_name):
+    """
+    Takes the raw DataFrame, the list of school names, and the name of the
+    statistic. Returns a long DataFrame with columns "Year", "School", and
+    the given statistic name, with one row per year and school (ordered by
+    year, then by school in the order of school_names).
+    """
+    num_schools = len(school_names)
+    values = df.iloc[:, 1:num_schools + 1].to_numpy()
+    return pd.DataFrame({
+        "Year": np.repeat(df["Time"].to_numpy(), num_schools),
+        "School": np.tile(np.asarray(school_names, dtype=object), len(df)),
+        stat_name: values.ravel()
+    })
+
+
+@stage
 def get_school_data(df, school_names, stat_name):
     """
     Takes the raw DataFrame, the list of school names, and the name of the
     statistic. Returns a list of dictionaries with keys "School", "Year", and
     the given statistic name.
     """
-    all_data = list()
-    for i in range(len(df)):
-        year = df.loc[i, "Time"]
-        for j in range(len(school_names)):
-            row = dict()
-            row["Year"] = year
-            row["School"] = school_names[j]
-            row[stat_name] = df.loc[i, df.columns[j + 1]]
-            all_data.append(row)
-    return all_data
+    return get_school_frame(df, school_names, stat_name).to_dict("records")
+
+
+def get_int_dtype(values, nullable):
+    """
+    Takes a Series of whole numbers and whether the dtype should allow
+    missing values. Returns the name of the smallest integer dtype that holds
+    every value.
+    """
+    low = values.min()
+    high = values.max()
+    for bits in (8, 16, 32, 64):
+        info = np.iinfo("int" + str(bits))
+        if info.min <= low and high <= info.max:
+            break
+    return ("Int" if nullable else "int") + str(bits)
+
+
+@stage
+def optimize_dtypes(df):
+    """
+    Takes a school data DataFrame and returns a copy with compact dtypes.
+    "School" becomes categorical and "Year" the smallest integer type that
+    fits. Other numeric columns of whole numbers become the smallest nullable
+    integer type that fits, and the rest become float32 only if every value
+    is stored exactly, so no result computed from them changes.
+    """
+    result = df.copy()
+    for column in df.columns:
+        result[column] = optimize_column(column, df[column])
+    return result
+
+
+def optimize_column(column, values):
+    """
+    Takes the name of a column and a Series of its values and returns them
+    with the compact dtype optimize_dtypes would choose for that column.
+    """
+    if column == "School":
+        return values.astype("category")
+    if not pd.api.types.is_numeric_dtype(values) or \
+            pd.api.types.is_bool_dtype(values):
+        return values
+    present = values.dropna().astype(float)
+    if len(present) == 0:
+        return values
+    if (present == np.round(present)).all():
+        nullable = column != "Year"
+        return values.astype(get_int_dtype(present, nullable))
+    with np.errstate(over="ignore"):
+        stored = present.astype("float32").astype(float)
+    if keeps_precision(present, stored):
+        return values.astype("float32")
+    return values
+
+
+def keeps_precision(values, stored):
+    """
+    Takes a Series of float values and a Series of the same values after
+    being stored in a smaller dtype. Returns whether every value was stored
+    exactly and missing values are still missing.
+    """
+    if not values.isna().equals(stored.isna()):
+        return False
+    return bool((stored.dropna() == values.dropna()).all())
+
+
+def fits_dtype(values, dtype):
+    """
+    Takes a Series of float values and a dtype and returns whether every
+    value can be stored exactly in that dtype, with missing values only if
+    the dtype allows them.
+    """
+    try:
+        with np.errstate(invalid="ignore", over="ignore"):
+            stored = values.astype(dtype).astype(float)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return keeps_precision(values, stored)
@@ -1,81 +1,257 @@
 # Name: Adam Klingler and Kayla Perez
 # Description: All the code required to generate our plots. This is the main
-#              program file.
+#              program file. seaborn and matplotlib take most of our startup
+#              time, so they are only imported by the functions that draw,
+#              and the export command, which only builds the data, never
+#              imports them.
+import argparse
+import hashlib
+import io
+import json
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-from scipy.stats import pearsonr
-from creating_dataframe import create_dataframe, get_names, read_data
+import pandas as pd
+import data_cleaning as dc
+from creating_dataframe import get_school_lists, update_dataframe
+import profiling
+from profiling import stage
+from regression import (CONFIDENCE, BOOTSTRAP_RESAMPLES, bootstrap_fit,
+                        fit_lines, get_confidence_band, get_interval)
+from school_query import SchoolData
+from school_store import check_export_file, export_dataframe, load_dataframe
+
+MANIFEST_FILE = "plot_manifest.json"
+ACCEPTED_COLUMNS = ["Year", "School", "grad_rate", "percent_accepted"]
+FIN_AID_COLUMNS = ["Year", "School", "population", "fin_aid_private",
+                   "fin_aid_public", "grad_rate"]
+
+# Per-school statistics of each dataframe we have seen, keyed by the id of the
+# dataframe, with a weak reference to check that it is still the same one
+_school_stats = dict()
+
+# Reusable (figure, axes) tuples for each figure size, drawn off-screen
+_figure_templates = dict()
+
+# Dictionaries from school to color for each tuple of schools plotted
+_school_palettes = dict()
+
+# Number of processes each bootstrap may use (None for one per CPU). Plotting
+# workers set it to 1, so they don't each start a pool of their own
+_bootstrap_workers = None
+
+# Manifest entries (plot key and fit summary) of the files this process has
+# rendered or skipped during the current plot job, keyed by file name
+_built_plots = dict()
 
 
 def plot_fit_line(data, ax, column, plot_title):
     """
     This takes in a dataframe data, plot axis ax, y-axis column, and plot title
     and plots a best fit line for data on ax, with x-axis of graduation rate
-    and y-axis of column, and prints out the Pearson R coefficient for the
-    plot.
+    and y-axis of column, with a shaded bootstrap confidence band, and prints
+    out the Pearson R coefficient and confidence intervals for the plot.
+    Returns the fit summary that was printed (see get_fit_summary).
     """
-    xs = data["grad_rate"]
-    ys = data[column]
-    fit = np.polyfit(xs, ys, 1)
+    fit = fit_lines(data, "grad_rate", column).iloc[0]
+    fits = bootstrap_fit(data, "grad_rate", column,
+                         workers=_bootstrap_workers)
 
     x = np.arange(0, 100, 0.1)
-    ax.plot(x, fit[0] * x + fit[1], color="#000000")
+    low, high = get_confidence_band(fits, x)
+    ax.fill_between(x, low, high, color="#000000", alpha=0.15, linewidth=0)
+    ax.plot(x, fit["slope"] * x + fit["intercept"], color="#000000")
     ax.set_xbound(0, 100)
     ax.set_ybound(0, 100)
-    r_coeff = pearsonr(xs, ys)[0]
+    summary = get_fit_summary(fit, fits)
+    print_fit_summary(summary, plot_title)
+    return summary
+
+
+def get_fit_summary(fit, fits):
+    """
+    This takes in a row of fit_lines and a dataframe of bootstrap fits (as
+    returned by regression.bootstrap_fit) and returns a dictionary of the
+    Pearson R coefficient "r" and the confidence intervals "slope_ci" and
+    "r_ci" of the slope and Pearson R coefficient, which can be saved as
+    JSON.
+    """
+    return {"r": float(fit["r"]),
+            "slope_ci": [float(end) for end in get_interval(fits["slope"])],
+            "r_ci": [float(end) for end in get_interval(fits["r"])]}
+
 
+def print_fit_summary(summary, plot_title):
+    """
+    This takes in a fit summary (as returned by get_fit_summary) and plot
+    title and prints out the Pearson R coefficient and confidence intervals
+    for the plot.
+    """
+    print_pearson_r(summary["r"], plot_title)
+    print_confidence_intervals(summary["slope_ci"], summary["r_ci"],
+                               plot_title)
+
+
+def print_pearson_r(r_coeff, plot_title):
+    """
+    This takes in a Pearson R coefficient and plot title and prints out the
+    coefficient for the plot.
+    """
     print(plot_title + " Pearson R: " + str(r_coeff))
 
 
+def print_confidence_intervals(slope, r_coeff, plot_title):
+    """
+    This takes in the (low, high) confidence intervals of the slope and
+    Pearson R coefficient and plot title and prints them out for the plot.
+    """
+    print("{} {:.0%} CI: slope {:.4f} to {:.4f}, Pearson R {:.4f} to "
+          "{:.4f}".format(plot_title, CONFIDENCE, *slope, *r_coeff))
+
+
+def get_school_stats(data):
+    """
+    This function takes in a dataframe data and returns a dataframe indexed
+    by school with the number of datapoints and the mean of every numeric
+    column of data, for example stats[("grad_rate", "count")]. The result is
+    only computed once for each dataframe, so data should not be modified
+    after it is passed in.
+    """
+    key = id(data)
+    if key in _school_stats:
+        ref, stats = _school_stats[key]
+        if ref() is data:
+            return stats
+
+    columns = [c for c in data.select_dtypes("number").columns if c != "Year"]
+    grouped = data.groupby("School", observed=True)[columns]
+    stats = grouped.agg(["count", "mean"])
+    set_school_stats(data, stats)
+    return stats
+
+
+def set_school_stats(data, stats):
+    """
+    This function takes in a dataframe data and its per-school statistics
+    stats (in the format returned by get_school_stats) and saves them, so
+    they are not computed again for data.
+    """
+    key = id(data)
+    ref = weakref.ref(data, lambda _: _school_stats.pop(key, None))
+    _school_stats[key] = (ref, stats)
+
+
+def update_school_stats(stats, old_rows, new_rows):
+    """
+    This function takes in per-school statistics stats (in the format
+    returned by get_school_stats), the rows removed from the data they were
+    computed from, and the rows added to it. It returns the statistics of the
+    new data, computed from the changed rows only.
+    """
+    columns = list(stats.columns.get_level_values(0).unique())
+    counts = stats.xs("count", axis=1, level=1).astype("int64")
+    means = stats.xs("mean", axis=1, level=1).astype(float)
+    sums = means.fillna(0) * counts
+    for rows, sign in ((old_rows, -1), (new_rows, 1)):
+        values = rows[columns].astype(float)
+        grouped = values.groupby(rows["School"].astype(str).to_numpy())
+        counts = counts.add(sign * grouped.count(), fill_value=0)
+        sums = sums.add(sign * grouped.sum(), fill_value=0)
+
+    counts = counts.astype("int64")
+    means = (sums / counts).where(counts > 0)
+    updated = pd.concat({"count": counts, "mean": means}, axis=1)
+    updated = updated.swaplevel(axis=1)[stats.columns].sort_index()
+    updated.index.name = "School"
+    return updated
+
+
+@stage
+def update_school_data(data, new_rows):
+    """
+    This function takes in a dataframe data and a dataframe of new or changed
+    rows (see creating_dataframe.update_dataframe) and returns data with the
+    rows added or updated. If the per-school statistics of data were already
+    computed, the ones of the result are updated from just the changed rows
+    instead of being computed again.
+    """
+    updated, old_rows, changed_rows = update_dataframe(data, new_rows)
+    cached = _school_stats.get(id(data))
+    if cached is not None and cached[0]() is data:
+        set_school_stats(updated, update_school_stats(cached[1], old_rows,
+                                                      changed_rows))
+    return updated
+
+
+@stage
 def filter_schools(data, school_names):
     """
     This function takes in a dataframe data and a list of school names
     and returns a filtered dataframe with those schools.
     """
-    is_school_type = data["School"].isin(school_names)
+    stats = get_school_stats(data)
+    schools = data["School"]
+    if not isinstance(schools.dtype, pd.CategoricalDtype):
+        schools = schools.astype("category")
+    # Look up the names among the categories once, then filter the rows on
+    # their integer category codes
+    categories = schools.cat.categories
     bothell = "University of Washington-Bothell Campus"
     tacoma = "University of Washington-Tacoma Campus"
-    not_satillite = (data["School"] != bothell) & (data["School"] != tacoma)
-    filtered_school_data = data[is_school_type & not_satillite]
+    is_kept = dc.get_category_mask(categories, school_names) & \
+        ~dc.get_category_mask(categories, [bothell, tacoma])
+    codes = schools.cat.codes.to_numpy()
+    filtered_school_data = data[is_kept[codes] & (codes >= 0)]
+
+    # Whole schools are kept, so their statistics are unchanged
+    set_school_stats(filtered_school_data,
+                     stats[stats.index.isin(categories[is_kept])])
     return filtered_school_data
 
 
+@stage
 def filter_sufficient_data(data, column, threshold):
     """
     This function takes in a dataframe data, a filter column, and a threshold
     for their being enough data and returns a filtered dataframe with at least
     threshold number of datapoints in column.
     """
-    filtered_data = data[["Year", "School", "grad_rate", column]]
-    column_count = filtered_data.groupby("School")[column].count()
     # Number of data points for column by school
-    has_enough_data_s = column_count >= threshold
-    names_with_data = column_count[has_enough_data_s].index
-    has_enough_data = filtered_data["School"].isin(names_with_data)
-    filtered_data = filtered_data[has_enough_data]
+    column_count = get_school_stats(data)[(column, "count")]
+    names_with_data = column_count.index[column_count >= threshold]
+    has_enough_data = data["School"].isin(names_with_data)
+    filtered_data = data.loc[has_enough_data,
+                             ["Year", "School", "grad_rate", column]]
     return filtered_data.dropna()
 
 
+@stage
 def get_names_lists():
     """
     Returns a tuple which contains the list of public schools (index 0) and
     the list of private schools (index 1).
     """
-    data = read_data()
-    names = get_names(data)
-    return (names[4], names[5])
+    return (get_school_lists("public_schools"),
+            get_school_lists("private_schools"))
 
 
+@stage
 def get_mean_data(data, column):
     """
     Takes in a dataframe data and a column and returns a dataframe of schools
     with the mean value of that column and graduation rate.
     """
-    return data.groupby("School")[column, "grad_rate"].mean().reset_index()
+    stats = get_school_stats(data)
+    means = stats[[(column, "mean"), ("grad_rate", "mean")]]
+    means.columns = [column, "grad_rate"]
+    return means.reset_index()
 
 
 # Question 0: Competitiveness
+@stage
 def plot_grad_rate_vs_percent_accepted(data):
     """
     This function takes in the relavent dataframe data and produces a plot
@@ -91,6 +267,7 @@ def plot_grad_rate_vs_percent_accepted(data):
                        (10, 10), save_file)
 
 
+@stage
 def plot_grad_rate_vs_percent_accepted_public(public_data):
     """
     This function takes in the relavent dataframe public_data and produces a
@@ -106,6 +283,7 @@ def plot_grad_rate_vs_percent_accepted_public(public_data):
                        (8, 8), save_file)
 
 
+@stage
 def plot_grad_rate_vs_percent_accepted_private(private_data):
     """
     This function takes in the relavent dataframe private_data and produces a
@@ -122,6 +300,7 @@ def plot_grad_rate_vs_percent_accepted_private(private_data):
                        (8, 8), save_file)
 
 
+@stage
 def plot_average_grad_rate_vs_percent_accepted(data):
     """
     This function takes in the relavent dataframe data and produces a plot
@@ -137,12 +316,13 @@ def plot_average_grad_rate_vs_percent_accepted(data):
     title = "Average Graduation Rate vs Average Percent Accepted- All"\
             + " Universities"
     ylabel = "Percent Accepted"
-    save_file = "av_grad_rate_v_compet_all"
+    save_file = "av_grad_rate_v_compet_all.png"
 
     plot_generic_graph(means, "percent_accepted", (title, ylabel),
                        (8, 8), save_file)
 
 
+@stage
 def plot_average_grad_rate_vs_percent_accepted_public(public_data):
     """
     This function takes in the relavent dataframe public_data and produces a
@@ -162,6 +342,7 @@ def plot_average_grad_rate_vs_percent_accepted_public(public_data):
                        (8, 8), save_file)
 
 
+@stage
 def plot_average_grad_rate_vs_percent_accepted_private(private_data):
     """
     This function takes in the relavent dataframe private_data and produces a
@@ -181,27 +362,30 @@ def plot_average_grad_rate_vs_percent_accepted_private(private_data):
 
 
 # Question 1: Financial Aid
+@stage
 def get_fin_aid_data(data):
     """
     This function takes in the data and calculates the subset of data for
     the financial aid plotting.
     """
-    short_df = data[["Year", "School", "population", "fin_aid_private",
-                     "fin_aid_public", "grad_rate"]]
-    short_df = short_df.dropna(thresh=5)
-    short_df.fillna(0, inplace=True)
-    short_df["fin_aid"] = np.abs(short_df["fin_aid_private"]
-                                 - short_df["fin_aid_public"])
-    short_df["fin_aid_ratio"] = (short_df["fin_aid"] /
-                                 short_df["population"] * 100)
+    query = SchoolData(data).select(["Year", "School", "population",
+                                     "fin_aid_private", "fin_aid_public",
+                                     "grad_rate"])
+    query = query.dropna(thresh=5).fillna(0)
+    query = query.derive("fin_aid", lambda c: np.abs(c["fin_aid_private"]
+                                                     - c["fin_aid_public"]))
+    query = query.derive("fin_aid_ratio",
+                         lambda c: c["fin_aid"] / c["population"] * 100)
 
     # Some fin_aid_ratios higher than 100, doesn't make sense
-    is_valid_fin_aid_ratio = short_df["fin_aid_ratio"] < 100
-    short_df = short_df[is_valid_fin_aid_ratio]
-    filtered = filter_sufficient_data(short_df, "fin_aid_ratio", 7)
-    return filtered
+    query = query.where(lambda c: c["fin_aid_ratio"] < 100)
+
+    # The same as filter_sufficient_data(..., "fin_aid_ratio", 7)
+    query = query.select(["Year", "School", "grad_rate", "fin_aid_ratio"])
+    return query.min_count("fin_aid_ratio", 7).dropna().collect()
 
 
+@stage
 def plot_grad_rate_vs_financial(data):
     """
     This function takes in the relavent dataframe data and produces a plot
@@ -217,6 +401,7 @@ def plot_grad_rate_vs_financial(data):
                        save_file)
 
 
+@stage
 def plot_grad_rate_vs_financial_public(public_data):
     """
     This function takes in the relavent dataframe public_data and produces a
@@ -232,6 +417,7 @@ def plot_grad_rate_vs_financial_public(public_data):
                        save_file)
 
 
+@stage
 def plot_grad_rate_vs_financial_private(private_data):
     """
     This function takes in the relavent dataframe private_data and produces a
@@ -247,6 +433,7 @@ def plot_grad_rate_vs_financial_private(private_data):
                        (10, 10), save_file)
 
 
+@stage
 def plot_average_grad_rate_vs_financial(data):
     """
     This function takes in the relavent dataframe data and produces a plot
@@ -263,6 +450,7 @@ def plot_average_grad_rate_vs_financial(data):
                        save_file)
 
 
+@stage
 def plot_average_grad_rate_vs_financial_public(public_data):
     """
     This function takes in the relavent dataframe public_data and produces a
@@ -279,6 +467,7 @@ def plot_average_grad_rate_vs_financial_public(public_data):
                        save_file)
 
 
+@stage
 def plot_average_grad_rate_vs_financial_private(private_data):
     """
     This function takes in the relavent dataframe private_data and produces a
@@ -295,56 +484,272 @@ def plot_average_grad_rate_vs_financial_private(private_data):
                        save_file)
 
 
+@stage
 def plot_generic_graph(data, column, labels, figsize, save_file):
     """
     This function takes in a dataframe data, y-axis column, a tuple labels
     with the format (title, ylabel), a size for the plot figsize, and
     a file name save_file, and creates a png of a plot called save_file for
-    the data and column given, with the correct labels and size.
+    the data and column given, with the correct labels and size. If
+    save_file was already made from the same data and arguments, the plot is
+    not drawn again, and the Pearson R coefficient and confidence intervals
+    saved in the manifest are printed instead.
+    """
+    plot_key = get_plot_key(data, column, labels, figsize)
+    entry = load_manifest().get(save_file)
+    if os.path.exists(save_file) and isinstance(entry, dict) and \
+            entry.get("key") == plot_key:
+        _built_plots[save_file] = entry
+        print_fit_summary(entry, labels[0])
+        return
+
+    fig, summary = draw_generic_graph(data, column, labels, figsize)
+    fig.savefig(save_file)
+    _built_plots[save_file] = dict(summary, key=plot_key)
+
+
+def draw_generic_graph(data, column, labels, figsize):
     """
-    fig, ax = plt.subplots(1, figsize=figsize)
+    This function takes in the same arguments as plot_generic_graph (other
+    than the file name), draws the plot, prints the Pearson R coefficient,
+    and returns a tuple of the figure, without saving it, and the fit summary
+    (see get_fit_summary). The figure is reused by the next plot of the same
+    size.
+    """
+    fig, ax = get_figure(figsize)
+    plot_school_scatter(data, ax, column)
+    summary = plot_fit_line(data, ax, column, labels[0])
 
-    sns.scatterplot(x="grad_rate", y=column, data=data, hue="School", ax=ax)
-    plot_fit_line(data, ax, column, labels[0])
+    ax.set_title(labels[0])
+    ax.set_xlabel("Graduation Rate")
+    ax.set_ylabel(labels[1])
+    return (fig, summary)
 
-    plt.title(labels[0])
-    plt.xlabel("Graduation Rate")
-    plt.ylabel(labels[1])
 
-    fig.savefig(save_file)
+def get_figure(figsize):
+    """
+    This function takes in a figure size and returns a tuple of a figure and
+    its cleared axes, which are not managed by pyplot. The same figure is
+    reused for every plot of the same size instead of making a new one.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    key = tuple(figsize)
+    if key not in _figure_templates:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _figure_templates[key] = (fig, fig.subplots())
+    fig, ax = _figure_templates[key]
+    ax.cla()
+    return (fig, ax)
 
 
-def main():
+def get_school_palette(schools):
     """
-    This function calls all the functions to create our dataframe and to
-    generate our plots.
+    This function takes in a list of schools and returns a dictionary from
+    each school to its color, chosen the same way seaborn picks hue colors.
+    The palette is only made once for each list of schools.
+    """
+    import seaborn as sns
+
+    key = tuple(schools)
+    if key not in _school_palettes:
+        if len(key) <= len(sns.color_palette()):
+            colors = sns.color_palette(n_colors=len(key))
+        else:
+            colors = sns.color_palette("husl", len(key))
+        _school_palettes[key] = dict(zip(key, colors))
+    return _school_palettes[key]
+
+
+def plot_school_scatter(data, ax, column):
+    """
+    This function takes in a dataframe data, plot axis ax, and y-axis column
+    and draws a scatter plot of graduation rate and column on ax, colored by
+    school, with a legend of the schools in the order they appear. It draws
+    the same plot as sns.scatterplot with hue="School", but in a single
+    scatter call with a cached palette.
+    """
+    from matplotlib import rcParams
+    from matplotlib.lines import Line2D
+
+    schools = list(pd.unique(data["School"]))
+    palette = get_school_palette(schools)
+    colors = np.array([palette[school] for school in schools]).reshape(-1, 3)
+    codes = pd.Index(schools).get_indexer(data["School"])
+
+    size = rcParams["lines.markersize"] ** 2
+    ax.scatter(data["grad_rate"], data[column], c=colors[codes], s=size,
+               edgecolor="w", linewidth=0.08 * np.sqrt(size))
+    handles = [Line2D([], [], marker="o", linestyle="", color=palette[school],
+                      markeredgecolor="w", label=school)
+               for school in schools]
+    ax.legend(handles=handles, title="School")
+
+
+def get_plot_key(data, column, labels, figsize):
+    """
+    This function takes in the arguments of plot_generic_graph (other than
+    the file name) and returns a hash of the data and plot parameters, which
+    changes whenever the plot would.
+    """
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(data).to_numpy().tobytes())
+    params = (list(data.columns), column, tuple(labels), tuple(figsize),
+              BOOTSTRAP_RESAMPLES, CONFIDENCE)
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+def load_manifest():
+    """
+    Returns the plot manifest, a dictionary from the file name of each plot
+    to a dictionary of the plot key "key" it was last rendered with and its
+    fit summary (see get_fit_summary), or an empty dictionary if there is no
+    manifest yet.
+    """
+    try:
+        with open(MANIFEST_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def save_manifest(manifest):
+    """
+    Takes in a plot manifest dictionary and saves it to MANIFEST_FILE.
     """
+    with open(MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def init_plot_style():
+    """
+    Sets up this process to render off-screen with our plot style.
+    """
+    import seaborn as sns
+
     sns.set()
-    # Getting all of the data
-    data = create_dataframe()
+
+
+def init_plot_worker():
+    """
+    Sets up a plotting worker process with our plot style, fitting its
+    bootstraps in the worker itself.
+    """
+    global _bootstrap_workers
+    _bootstrap_workers = 1
+    init_plot_style()
+    # Forget any trace events copied from the parent process
+    profiling.take_events()
+
+
+def run_plot_job(job):
+    """
+    Takes in a job tuple of the format (plot_function, data), calls
+    plot_function on data, and returns a tuple of everything it printed as a
+    string, a dictionary of the manifest entries of the files it made, and
+    the list of profiling trace events it recorded.
+    """
+    plot_function, data = job
+    _built_plots.clear()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        plot_function(data)
+    return (output.getvalue(), dict(_built_plots), profiling.take_events())
+
+
+@stage
+def render_plots(jobs, workers=None):
+    """
+    Takes in a list of jobs of the format (plot_function, data) and the number
+    of worker processes to use (None for one per CPU), and renders every plot.
+    The jobs are rendered in parallel, but whatever they print is printed in
+    the order of jobs. Plots whose data and arguments have not changed since
+    they were last rendered are skipped.
+    """
+    manifest = load_manifest()
+    if workers == 1:
+        init_plot_style()
+        results = map(run_plot_job, jobs)
+        for output, built, events in results:
+            print(output, end="")
+            manifest.update(built)
+            profiling.add_events(events)
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=init_plot_worker) as pool:
+            for output, built, events in pool.map(run_plot_job, jobs):
+                print(output, end="")
+                manifest.update(built)
+                profiling.add_events(events)
+    save_manifest(manifest)
+
+
+def main(workers=None):
+    """
+    This function calls all the functions to create our dataframe and to
+    generate our plots, using workers processes to render them (None for one
+    per CPU).
+    """
+    # Getting all of the data, loading only the columns each question uses
     names = get_names_lists()
+    data = load_dataframe(ACCEPTED_COLUMNS)
     public_data = filter_schools(data, names[0])
     private_data = filter_schools(data, names[1])
-    fin_aid_data = get_fin_aid_data(data)
-    public_fin_aid_data = get_fin_aid_data(public_data)
-    private_fin_aid_data = get_fin_aid_data(private_data)
-
-    # Plots for Question 0
-    plot_grad_rate_vs_percent_accepted(data)
-    plot_grad_rate_vs_percent_accepted_public(public_data)
-    plot_grad_rate_vs_percent_accepted_private(private_data)
-    plot_average_grad_rate_vs_percent_accepted(data)
-    plot_average_grad_rate_vs_percent_accepted_public(public_data)
-    plot_average_grad_rate_vs_percent_accepted_private(private_data)
-
-    # Plots for Question 1
-    plot_grad_rate_vs_financial(fin_aid_data)
-    plot_grad_rate_vs_financial_public(public_fin_aid_data)
-    plot_grad_rate_vs_financial_private(private_fin_aid_data)
-    plot_average_grad_rate_vs_financial(fin_aid_data)
-    plot_average_grad_rate_vs_financial_public(public_fin_aid_data)
-    plot_average_grad_rate_vs_financial_private(private_fin_aid_data)
+    aid_data = load_dataframe(FIN_AID_COLUMNS)
+    fin_aid_data = get_fin_aid_data(aid_data)
+    public_fin_aid_data = get_fin_aid_data(filter_schools(aid_data, names[0]))
+    private_fin_aid_data = get_fin_aid_data(filter_schools(aid_data,
+                                                           names[1]))
+
+    jobs = [
+        # Plots for Question 0
+        (plot_grad_rate_vs_percent_accepted, data),
+        (plot_grad_rate_vs_percent_accepted_public, public_data),
+        (plot_grad_rate_vs_percent_accepted_private, private_data),
+        (plot_average_grad_rate_vs_percent_accepted, data),
+        (plot_average_grad_rate_vs_percent_accepted_public, public_data),
+        (plot_average_grad_rate_vs_percent_accepted_private, private_data),
+
+        # Plots for Question 1
+        (plot_grad_rate_vs_financial, fin_aid_data),
+        (plot_grad_rate_vs_financial_public, public_fin_aid_data),
+        (plot_grad_rate_vs_financial_private, private_fin_aid_data),
+        (plot_average_grad_rate_vs_financial, fin_aid_data),
+        (plot_average_grad_rate_vs_financial_public, public_fin_aid_data),
+        (plot_average_grad_rate_vs_financial_private, private_fin_aid_data)
+    ]
+    render_plots(jobs, workers)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate our plots.")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of plotting processes (default: one "
+                             "per CPU)")
+    parser.add_argument("--profile", nargs="?", metavar="TRACE_FILE",
+                        const=profiling.DEFAULT_TRACE_FILE,
+                        help="time every stage and save a Chrome trace "
+                             "(default file: %(const)s)")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("plot", help="generate our plots (the default)")
+    export_parser = commands.add_parser(
+        "export", help="only build our main dataframe and save it")
+    export_parser.add_argument("output", help="file to save to (.csv, "
+                                              ".parquet, or .pkl)")
+    export_parser.add_argument("--columns", nargs="+", default=None,
+                               help="columns to save (default: all)")
+    args = parser.parse_args()
+    if args.command == "export":
+        try:
+            check_export_file(args.output)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.profile is not None:
+        profiling.enable(args.profile)
+    if args.command == "export":
+        export_dataframe(args.output, args.columns)
+    else:
+        main(args.workers)
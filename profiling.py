@@ -0,0 +1,177 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Opt-in timing of each stage of our pipeline. Set the
+#              CSE163_PROFILE environment variable to the name of a trace
+#              file (or pass --profile to plotting.py) to record the wall
+#              time, CPU time, rows in and out, and change in resident memory
+#              (RSS) of every stage. The trace can be opened in
+#              chrome://tracing or Perfetto, and a summary table is printed
+#              when the program exits.
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+PROFILE_ENV = "CSE163_PROFILE"
+DEFAULT_TRACE_FILE = "trace.json"
+
+_trace_file = None
+# Chrome trace events recorded by this process
+_events = list()
+
+
+def enable(trace_file=DEFAULT_TRACE_FILE):
+    """
+    Turns on profiling, saving the trace to trace_file when the program
+    exits. Processes started afterwards are profiled too.
+    """
+    global _trace_file
+    if _trace_file is None:
+        atexit.register(save_trace)
+    _trace_file = trace_file
+    os.environ[PROFILE_ENV] = trace_file
+
+
+def is_enabled():
+    """
+    Returns whether profiling is turned on.
+    """
+    return _trace_file is not None
+
+
+def get_rss():
+    """
+    Returns the resident memory of this process in bytes. It is read from
+    /proc where possible, and otherwise is the peak resident memory so far,
+    or 0 if neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_rows(value):
+    """
+    Takes in an argument or return value of a stage and returns its number of
+    rows if it is a DataFrame, Series, or list, the total rows if it is a
+    tuple of DataFrames, or None otherwise.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, list)):
+        return len(value)
+    if isinstance(value, tuple) and len(value) > 0 and \
+            all(isinstance(v, (pd.DataFrame, pd.Series)) for v in value):
+        return sum(len(v) for v in value)
+    return None
+
+
+def stage(function):
+    """
+    Decorator that records a trace event for every call of function while
+    profiling is turned on. When it is off, function is called directly.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _trace_file is None:
+            return function(*args, **kwargs)
+
+        rows_in = None
+        for arg in args:
+            rows_in = count_rows(arg)
+            if rows_in is not None:
+                break
+        memory_before = get_rss()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        end = time.perf_counter()
+        cpu_end = time.process_time()
+        memory_after = get_rss()
+
+        _events.append({
+            "name": function.__name__,
+            "cat": function.__module__,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"cpu_ms": (cpu_end - cpu_start) * 1e3,
+                     "rows_in": rows_in,
+                     "rows_out": count_rows(result),
+                     "memory_delta_bytes": memory_after - memory_before}
+        })
+        return result
+    return wrapper
+
+
+def take_events():
+    """
+    Returns the trace events recorded by this process so far and forgets
+    them, so they can be passed to another process.
+    """
+    events = list(_events)
+    _events.clear()
+    return events
+
+
+def add_events(events):
+    """
+    Takes in a list of trace events recorded by another process and adds
+    them to this process's trace.
+    """
+    _events.extend(events)
+
+
+def get_summary():
+    """
+    Returns a summary table of the trace as a string, with the number of
+    calls, total wall time, CPU time, rows out, and memory change of each
+    stage, slowest first.
+    """
+    totals = dict()
+    for event in _events:
+        key = event["cat"] + "." + event["name"]
+        total = totals.setdefault(key, [0, 0.0, 0.0, 0, 0])
+        total[0] += 1
+        total[1] += event["dur"] / 1e3
+        total[2] += event["args"]["cpu_ms"]
+        total[3] += event["args"]["rows_out"] or 0
+        total[4] += event["args"]["memory_delta_bytes"]
+
+    lines = ["{:<55} {:>6} {:>10} {:>10} {:>10} {:>12}".format(
+        "stage", "calls", "wall ms", "cpu ms", "rows out", "memory")]
+    for key, total in sorted(totals.items(), key=lambda item: -item[1][1]):
+        lines.append("{:<55} {:>6} {:>10.1f} {:>10.1f} {:>10} {:>12}".format(
+            key, *total))
+    return "\n".join(lines)
+
+
+def save_trace():
+    """
+    Saves the trace to the trace file in Chrome trace format and prints the
+    summary table. Only the main process saves the trace.
+    """
+    if multiprocessing.parent_process() is not None:
+        return
+    with open(_trace_file, "w") as f:
+        json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, f)
+    print(get_summary(), file=sys.stderr)
+    print("Saved trace to", _trace_file, file=sys.stderr)
+
+
+if os.environ.get(PROFILE_ENV):
+    enable(os.environ[PROFILE_ENV])
@@ -0,0 +1,165 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Functions for fitting best fit lines and Pearson R
+#              coefficients to many groups of data at once, and bootstrap
+#              confidence intervals for them.
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BOOTSTRAP_RESAMPLES = 2000
+CONFIDENCE = 0.95
+# Resamples are drawn in batches of at most this many, each from its own
+# seed, so the results are the same however the batches are split between
+# processes
+BOOTSTRAP_BATCH = 250
+# Largest number of resampled values (resamples times rows) in one batch,
+# which keeps each batch's arrays to tens of megabytes however many rows
+# there are
+BOOTSTRAP_BATCH_VALUES = 10 ** 6
+# Data is resampled in parallel when the resamples hold more values than this
+PARALLEL_VALUES = 10 ** 7
+
+
+def fit_lines(data, x, y, by=None):
+    """
+    Takes in a dataframe data, the names of the x and y columns, and the name
+    (or list of names) of the columns to group by, or None to fit all of data
+    as one group. Returns a dataframe with a row for each group and the
+    columns "slope", "intercept", "r", "p_value", and "n" of the least
+    squares line of y on x and the Pearson R coefficient between them. Rows
+    missing x or y are ignored. Every group is fit at once from group-wise
+    sums, without looping over the groups.
+    """
+    has_pair = data[x].notna() & data[y].notna()
+    pairs = pd.DataFrame({"x": data.loc[has_pair, x].astype(float),
+                          "y": data.loc[has_pair, y].astype(float)})
+    if by is None:
+        by_columns = list()
+        keys = np.zeros(len(pairs), dtype=np.int64)
+    else:
+        by_columns = [by] if isinstance(by, str) else list(by)
+        keys = [data.loc[has_pair, column] for column in by_columns]
+        if len(keys) == 1:
+            keys = keys[0]
+
+    # Only groups with rows are fit, even for categorical columns
+    grouped = pairs.groupby(keys, observed=True)
+    n = grouped["x"].count()
+    x_mean = grouped["x"].transform("mean")
+    y_mean = grouped["y"].transform("mean")
+
+    # Sums of squares and products about each group's means
+    dx = pairs["x"] - x_mean
+    dy = pairs["y"] - y_mean
+    sums = pd.DataFrame({"xx": dx * dx, "yy": dy * dy, "xy": dx * dy})
+    sums = sums.groupby(keys, observed=True).sum()
+
+    slope = sums["xy"] / sums["xx"]
+    intercept = grouped["y"].mean() - slope * grouped["x"].mean()
+    r = (sums["xy"] / np.sqrt(sums["xx"] * sums["yy"])).clip(-1, 1)
+
+    # Two-sided p-value of the t statistic for r with n - 2 degrees of freedom
+    dof = (n - 2).where(n > 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_stat = r * np.sqrt(dof / (1 - r * r))
+    from scipy.stats import t as t_dist
+    p_value = pd.Series(2 * t_dist.sf(np.abs(t_stat), dof), index=n.index)
+    # Two points always give r = 1 or -1, which scipy.stats.pearsonr gives a
+    # p-value of 1, so only perfect fits of more points get a p-value of 0
+    p_value[(r.abs() == 1) & (n > 2)] = 0.0
+    p_value[n == 2] = 1.0
+
+    fits = pd.DataFrame({"slope": slope, "intercept": intercept, "r": r,
+                         "p_value": p_value, "n": n})
+    if by is None:
+        return fits.reset_index(drop=True)
+    fits.index.names = by_columns
+    return fits
+
+
+def fit_resamples(x, y, seed, num_resamples):
+    """
+    Takes in NumPy arrays x and y of the same length, a NumPy SeedSequence
+    seed, and the number of resamples. Draws num_resamples bootstrap
+    resamples of the (x, y) pairs as one matrix of row indices, and returns
+    a tuple of arrays of the slope, intercept, and Pearson R coefficient of
+    the least squares line of each resample, all fit at once.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(x), (num_resamples, len(x)))
+    xs = x[rows]
+    ys = y[rows]
+    x_mean = xs.mean(axis=1)
+    y_mean = ys.mean(axis=1)
+    dx = xs - x_mean[:, np.newaxis]
+    dy = ys - y_mean[:, np.newaxis]
+    xx = (dx * dx).sum(axis=1)
+    yy = (dy * dy).sum(axis=1)
+    xy = (dx * dy).sum(axis=1)
+
+    # Resamples that repeat a single point have no line
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = xy / xx
+        r = np.clip(xy / np.sqrt(xx * yy), -1, 1)
+    return (slope, y_mean - slope * x_mean, r)
+
+
+def bootstrap_fit(data, x, y, num_resamples=BOOTSTRAP_RESAMPLES, seed=0,
+                  workers=None):
+    """
+    Takes in a dataframe data, the names of the x and y columns, the number
+    of bootstrap resamples, a random seed, and the number of processes to
+    use for large data (None for one per CPU, or 1 when already running in a
+    worker process). Returns a dataframe with a row for each resample of the
+    rows of data and the columns "slope", "intercept", and "r" of its least
+    squares line of y on x. Rows missing x or y are ignored. The results only
+    depend on the seed.
+    """
+    has_pair = data[x].notna() & data[y].notna()
+    x_values = data.loc[has_pair, x].to_numpy(dtype=float)
+    y_values = data.loc[has_pair, y].to_numpy(dtype=float)
+    if len(x_values) < 2:
+        empty = np.full(num_resamples, np.nan)
+        return pd.DataFrame({"slope": empty, "intercept": empty, "r": empty})
+
+    batch = max(1, min(BOOTSTRAP_BATCH,
+                       BOOTSTRAP_BATCH_VALUES // len(x_values)))
+    sizes = [min(batch, num_resamples - start)
+             for start in range(0, num_resamples, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([x_values] * len(sizes), [y_values] * len(sizes), seeds, sizes)
+    if len(x_values) * num_resamples > PARALLEL_VALUES and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(fit_resamples, *args))
+    else:
+        batches = list(map(fit_resamples, *args))
+
+    slope, intercept, r = (np.concatenate(values) for values in
+                           zip(*batches))
+    return pd.DataFrame({"slope": slope, "intercept": intercept, "r": r})
+
+
+def get_interval(values, confidence=CONFIDENCE):
+    """
+    Takes in an array of bootstrap values and the confidence level, and
+    returns a tuple of the low and high ends of the percentile confidence
+    interval, ignoring missing values.
+    """
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.nanpercentile(values, [tail, 100 - tail])
+    return (low, high)
+
+
+def get_confidence_band(fits, x, confidence=CONFIDENCE):
+    """
+    Takes in a dataframe of bootstrap fits (as returned by bootstrap_fit), an
+    array of x values, and the confidence level. Returns a tuple of arrays of
+    the low and high ends of the confidence interval of the line at each x.
+    """
+    slope = fits["slope"].to_numpy()[:, np.newaxis]
+    intercept = fits["intercept"].to_numpy()[:, np.newaxis]
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.nanpercentile(slope * x + intercept, [tail, 100 - tail],
+                                 axis=0)
+    return (low, high)
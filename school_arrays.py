@@ -0,0 +1,119 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Exports our cleaned statistics as dense school by year
+#              matrices saved as .npy files, so other programs can use them
+#              without running our pipeline. Run it with:
+#
+#              python school_arrays.py -o school_arrays
+#
+#              Each matrix can then be opened without reading it into memory
+#              with np.load("school_arrays/grad_rate.npy", mmap_mode="r").
+#              Row i of every matrix is the school at position i of
+#              "schools" in index.json, and column j is the year at position
+#              j of "years". Missing values are NaN.
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from plotting import ACCEPTED_COLUMNS, FIN_AID_COLUMNS, get_fin_aid_data
+from profiling import stage
+from school_store import load_dataframe
+
+ARRAYS_DIR = "school_arrays"
+INDEX_FILE = "index.json"
+
+
+def get_statistics():
+    """
+    Returns a dictionary from the name of each exported statistic to a
+    DataFrame with its "Year", "School", and statistic columns, cleaned the
+    same way as for our plots.
+    """
+    data = load_dataframe(ACCEPTED_COLUMNS)
+    fin_aid_data = get_fin_aid_data(load_dataframe(FIN_AID_COLUMNS))
+    return {"grad_rate": data[["Year", "School", "grad_rate"]],
+            "percent_accepted": data[["Year", "School", "percent_accepted"]],
+            "fin_aid_ratio": fin_aid_data[["Year", "School",
+                                           "fin_aid_ratio"]]}
+
+
+def write_matrix(file_name, data, column, schools, years):
+    """
+    Takes in a file name, a DataFrame data with "Year", "School", and column
+    columns, and Indexes of the schools and years. Writes a school by year
+    float64 matrix of column to file_name as a .npy file, with NaN for
+    missing values. The matrix is written to a temporary file first, so
+    programs that have the old file open keep seeing the old matrix.
+    """
+    rows = schools.get_indexer(data["School"])
+    columns = years.get_indexer(data["Year"])
+    temp_file = file_name + "." + str(os.getpid()) + ".npy"
+    matrix = np.lib.format.open_memmap(temp_file, mode="w+",
+                                       dtype=np.float64,
+                                       shape=(len(schools), len(years)))
+    matrix[:] = np.nan
+    matrix[rows, columns] = data[column].to_numpy(dtype=float,
+                                                  na_value=np.nan)
+    matrix.flush()
+    del matrix
+    os.replace(temp_file, file_name)
+
+
+@stage
+def export_arrays(array_dir=ARRAYS_DIR):
+    """
+    Writes a school by year matrix for each statistic from get_statistics to
+    array_dir, named after the statistic, and an index file listing the
+    school of each row and the year of each column.
+    """
+    statistics = get_statistics()
+    all_rows = pd.concat(statistics.values())
+    schools = pd.Index(sorted(all_rows["School"].astype(str).unique()))
+    years = pd.Index(sorted(all_rows["Year"].unique()))
+
+    os.makedirs(array_dir, exist_ok=True)
+    for name, data in statistics.items():
+        write_matrix(os.path.join(array_dir, name + ".npy"),
+                     data.astype({"School": str}), name, schools, years)
+    index = {"schools": list(schools),
+             "years": [int(year) for year in years],
+             "statistics": list(statistics)}
+    with open(os.path.join(array_dir, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=2)
+
+
+def load_index(array_dir=ARRAYS_DIR):
+    """
+    Returns the index of the matrices in array_dir, a dictionary with the
+    list of "schools" for the rows, "years" for the columns, and the names of
+    the "statistics".
+    """
+    with open(os.path.join(array_dir, INDEX_FILE)) as f:
+        return json.load(f)
+
+
+def load_matrix(name, array_dir=ARRAYS_DIR):
+    """
+    Returns the school by year matrix of the statistic name in array_dir,
+    memory-mapped read-only, so only the parts that are used are read.
+    """
+    return np.load(os.path.join(array_dir, name + ".npy"), mmap_mode="r")
+
+
+def main():
+    """
+    This function exports the matrices to the directory given on the command
+    line.
+    """
+    parser = argparse.ArgumentParser(description="Export our statistics as "
+                                                 ".npy matrices.")
+    parser.add_argument("-o", "--output", default=ARRAYS_DIR,
+                        help="directory to save to (default: %(default)s)")
+    args = parser.parse_args()
+    export_arrays(args.output)
+    print("Saved matrices to", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: A lazy query API over our school data. A query is built up one
+#              step at a time, and nothing is computed until collect is
+#              called, at which point every step is run in a single pass
+#              without making a copy of the data for each step.
+import numpy as np
+import pandas as pd
+
+
+class _Columns(dict):
+    """
+    A dictionary of the columns a query is working with, which looks up any
+    column it does not have yet in the original DataFrame (without copying
+    it).
+    """
+    def __init__(self, data):
+        super().__init__()
+        self._data = data
+
+    def __missing__(self, name):
+        column = self._data[name]
+        self[name] = column
+        return column
+
+
+def to_mask(values):
+    """
+    Takes in a boolean array or Series, which may contain missing values,
+    and returns it as a NumPy boolean array with missing values as False.
+    """
+    return pd.Series(values).fillna(False).to_numpy(dtype=bool)
+
+
+def get_school_codes(schools):
+    """
+    Takes in a "School" column and returns a NumPy array with an integer
+    code for the school of each row, along with the number of codes.
+    """
+    if isinstance(schools.dtype, pd.CategoricalDtype):
+        return (schools.cat.codes.to_numpy(),
+                len(schools.cat.categories))
+    codes, uniques = pd.factorize(schools)
+    return (codes, len(uniques))
+
+
+class SchoolData:
+    """
+    A lazy query over a school data DataFrame, for example:
+
+    SchoolData(data).select(["School", "grad_rate"]).min_count("grad_rate",
+    10).collect()
+
+    Every method returns a new query with one more step, and collect runs
+    them all and returns the resulting DataFrame.
+    """
+    def __init__(self, data, steps=()):
+        """
+        Takes in a DataFrame data and the tuple of steps to run on it.
+        """
+        self._data = data
+        self._steps = tuple(steps)
+
+    def _add_step(self, *step):
+        """
+        Returns a new query with the given step added to the end.
+        """
+        return SchoolData(self._data, self._steps + (step,))
+
+    def select(self, columns):
+        """
+        Returns a query that only keeps the given list of columns, in that
+        order.
+        """
+        return self._add_step("select", list(columns))
+
+    def where(self, predicate):
+        """
+        Returns a query that only keeps the rows where predicate is True.
+        predicate is given a dictionary of the columns by name and returns a
+        boolean array or Series.
+        """
+        return self._add_step("where", predicate)
+
+    def derive(self, name, function):
+        """
+        Returns a query that adds a column called name (to the end of the
+        selected columns). function is given a dictionary of the columns by
+        name and returns the values of the new column.
+        """
+        return self._add_step("derive", name, function)
+
+    def fillna(self, value):
+        """
+        Returns a query that replaces missing values in the selected columns
+        with value.
+        """
+        return self._add_step("fillna", value)
+
+    def dropna(self, thresh=None):
+        """
+        Returns a query that drops rows missing a value in any selected
+        column, or, if thresh is given, rows with fewer than thresh values in
+        the selected columns.
+        """
+        return self._add_step("dropna", thresh)
+
+    def min_count(self, column, threshold):
+        """
+        Returns a query that only keeps schools with at least threshold
+        values in column, counting only the rows still kept at this step.
+        """
+        return self._add_step("min_count", column, threshold)
+
+    def collect(self):
+        """
+        Runs every step of the query and returns the resulting DataFrame,
+        which keeps the index of the original rows.
+        """
+        data = self._data
+        columns = _Columns(data)
+        selected = list(data.columns)
+        keep = np.ones(len(data), dtype=bool)
+
+        for step in self._steps:
+            kind = step[0]
+            if kind == "select":
+                selected = step[1]
+            elif kind == "where":
+                keep &= to_mask(step[1](columns))
+            elif kind == "derive":
+                columns[step[1]] = pd.Series(step[2](columns),
+                                             index=data.index)
+                if step[1] not in selected:
+                    selected = selected + [step[1]]
+            elif kind == "fillna":
+                for name in selected:
+                    if columns[name].hasnans:
+                        columns[name] = columns[name].fillna(step[1])
+            elif kind == "dropna":
+                present = sum(columns[name].notna().to_numpy(dtype=int)
+                              for name in selected)
+                needed = len(selected) if step[1] is None else step[1]
+                keep &= present >= needed
+            elif kind == "min_count":
+                codes, num_schools = get_school_codes(columns["School"])
+                counted = keep & columns[step[1]].notna().to_numpy() & \
+                    (codes >= 0)
+                counts = np.bincount(codes[counted], minlength=num_schools)
+                keep &= (codes >= 0) & (counts[codes] >= step[2])
+
+        positions = np.flatnonzero(keep)
+        return pd.DataFrame({name: columns[name].take(positions)
+                             for name in selected})
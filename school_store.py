@@ -0,0 +1,232 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Functions for saving our main dataframe to an on-disk Parquet
+#              store, partitioned by year, and loading only the rows and
+#              columns that are needed from it.
+import glob
+import importlib.util
+import json
+import os
+import shutil
+
+import pandas as pd
+import data_cleaning as dc
+from creating_dataframe import (create_dataframe, get_datasets, get_file_key,
+                                update_dataframe)
+from profiling import stage
+
+STORE_DIR = "school_store"
+# Files starting with "_" are skipped when Parquet reads the store
+SOURCES_FILE = "_sources.json"
+# The batches of rows added by update_store_rows, replayed after rebuilds
+UPSERTS_FILE = "_upserts.pkl"
+EXPORT_EXTENSIONS = (".csv", ".parquet", ".pkl")
+
+
+def get_source_keys():
+    """
+    Returns a list with the registry entry and the file key (see
+    get_file_key) of each of our datasets, which changes whenever any of the
+    datasets or their entries in datasets.toml do.
+    """
+    return [[d, list(get_file_key(d["file"]))] for d in get_datasets()]
+
+
+@stage
+def save_store(data, store_dir=STORE_DIR, upserts=None):
+    """
+    Takes in our main dataframe data and saves it as a Parquet store in
+    store_dir, with one partition for each year, replacing any store that was
+    already there. If a list of the batches of rows added to data by
+    update_store_rows is given, it is saved with the store, and otherwise the
+    store has none.
+    """
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    data.to_parquet(store_dir, partition_cols=["Year"], index=False)
+    with open(os.path.join(store_dir, SOURCES_FILE), "w") as f:
+        json.dump(get_source_keys(), f)
+    if upserts:
+        save_upserts(upserts, store_dir)
+
+
+def load_upserts(store_dir=STORE_DIR):
+    """
+    Returns the list of the batches of rows added to the store in store_dir
+    by update_store_rows, oldest first, or an empty list if there are none.
+    """
+    upserts_file = os.path.join(store_dir, UPSERTS_FILE)
+    if not os.path.exists(upserts_file):
+        return list()
+    return pd.read_pickle(upserts_file)
+
+
+def save_upserts(upserts, store_dir=STORE_DIR):
+    """
+    Takes in a list of the batches of rows added by update_store_rows and
+    saves it to the store in store_dir.
+    """
+    upserts_file = os.path.join(store_dir, UPSERTS_FILE)
+    temp_file = upserts_file + "." + str(os.getpid())
+    pd.to_pickle(upserts, temp_file)
+    os.replace(temp_file, upserts_file)
+
+
+def clear_store_rows(store_dir=STORE_DIR):
+    """
+    Forgets the rows added to the store in store_dir by update_store_rows,
+    for example once our datasets include them, and rebuilds the store from
+    the datasets alone.
+    """
+    upserts_file = os.path.join(store_dir, UPSERTS_FILE)
+    if os.path.exists(upserts_file):
+        os.remove(upserts_file)
+        save_store(create_dataframe(), store_dir)
+
+
+def is_store_current(store_dir=STORE_DIR):
+    """
+    Returns whether the store in store_dir exists and was built from the
+    current version of every dataset and of the registry.
+    """
+    try:
+        with open(os.path.join(store_dir, SOURCES_FILE)) as f:
+            return json.load(f) == get_source_keys()
+    except (OSError, ValueError):
+        return False
+
+
+def update_store(store_dir=STORE_DIR):
+    """
+    Builds the store in store_dir from create_dataframe if it is missing or
+    any of the datasets have changed since it was built. The rows added by
+    update_store_rows are added again on top of the rebuilt data, in the
+    order they were first added, so a rebuild never loses them.
+    """
+    if not is_store_current(store_dir):
+        upserts = load_upserts(store_dir)
+        data = create_dataframe()
+        for new_rows in upserts:
+            data = update_dataframe(data, new_rows)[0]
+        save_store(data, store_dir, upserts)
+
+
+@stage
+def update_store_rows(new_rows, store_dir=STORE_DIR):
+    """
+    Takes in a DataFrame new_rows of new or changed rows (see
+    creating_dataframe.update_dataframe), for example a new year of our
+    datasets, and adds them to the store in store_dir, which must already
+    exist. Only the partitions of the years in new_rows are read and
+    rewritten, unless the new values do not fit the store's column types, in
+    which case the whole store is rewritten. The rows are also saved with
+    the store, so update_store adds them again whenever it rebuilds the
+    store, until clear_store_rows is called.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    upserts = load_upserts(store_dir) + [new_rows]
+    years = sorted(set(new_rows["Year"]))
+    current = load_store(years=years, store_dir=store_dir)
+    updated = update_dataframe(current, new_rows)[0]
+
+    parts = sorted(glob.glob(os.path.join(store_dir, "Year=*", "*.parquet")))
+    schema = pq.read_schema(parts[0])
+    try:
+        tables = [(year, pa.Table.from_pandas(rows.drop(columns="Year"),
+                                              schema=schema,
+                                              preserve_index=False))
+                  for year, rows in updated.groupby("Year")]
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        data = load_store(store_dir=store_dir)
+        save_store(update_dataframe(data, new_rows)[0], store_dir, upserts)
+        return
+
+    save_upserts(upserts, store_dir)
+    for year, table in tables:
+        partition = os.path.join(store_dir, "Year=" + str(year))
+        if os.path.exists(partition):
+            shutil.rmtree(partition)
+        os.makedirs(partition)
+        pq.write_table(table, os.path.join(partition, "part-0.parquet"))
+
+
+@stage
+def load_store(columns=None, schools=None, years=None, store_dir=STORE_DIR):
+    """
+    Loads our main dataframe from the store in store_dir. Only the given list
+    of columns is read (all columns if None), and only the rows for the given
+    schools and years (all of them if None). The filters are applied while
+    reading, so skipped years are never opened. Rows are sorted by school and
+    then year, the same as create_dataframe.
+    """
+    filters = list()
+    if schools is not None:
+        filters.append(("School", "in", list(schools)))
+    if years is not None:
+        filters.append(("Year", "in", list(years)))
+
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(["Year", "School"] + columns))
+    data = pd.read_parquet(store_dir, columns=read_columns,
+                           filters=filters if len(filters) > 0 else None)
+
+    # Year comes back as a categorical, since it is the partition column
+    data["Year"] = data["Year"].astype("int64")
+    data = dc.optimize_dtypes(data)
+    # Schools added by update_store_rows come last in the store's categories,
+    # so the categories are sorted to sort the rows by school name
+    schools = data["School"].cat.categories
+    data["School"] = data["School"].cat.reorder_categories(sorted(schools))
+    data = data.sort_values(["School", "Year"], ignore_index=True)
+    if columns is None:
+        other_columns = [c for c in data.columns if c != "Year"]
+        return data[["Year"] + other_columns]
+    return data[columns]
+
+
+def load_dataframe(columns=None, schools=None, years=None):
+    """
+    Returns our main dataframe with only the given columns, schools, and
+    years (all of them if None), loading it from the store, which is built or
+    rebuilt first if needed. If pyarrow is not installed, the dataframe is
+    created from the datasets instead.
+    """
+    if importlib.util.find_spec("pyarrow") is None:
+        data = create_dataframe()
+        if schools is not None:
+            data = data[data["School"].isin(schools)]
+        if years is not None:
+            data = data[data["Year"].isin(years)]
+        data = data.reset_index(drop=True)
+        return data if columns is None else data[columns]
+    update_store()
+    return load_store(columns, schools, years)
+
+
+def check_export_file(file_name):
+    """
+    Takes in a file name and raises a ValueError if export_dataframe can't
+    save to it, because its extension is not one of EXPORT_EXTENSIONS.
+    """
+    if not file_name.endswith(EXPORT_EXTENSIONS):
+        raise ValueError("Can only export to .csv, .parquet, or .pkl files, "
+                         "not " + file_name)
+
+
+def export_dataframe(file_name, columns=None, schools=None, years=None):
+    """
+    Saves our main dataframe, with only the given columns, schools, and years
+    (all of them if None), to file_name as a CSV, Parquet, or pickle file,
+    depending on its extension. The extension is checked before any data is
+    loaded.
+    """
+    check_export_file(file_name)
+    data = load_dataframe(columns, schools, years)
+    if file_name.endswith(".csv"):
+        data.to_csv(file_name, index=False)
+    elif file_name.endswith(".parquet"):
+        data.to_parquet(file_name, index=False)
+    else:
+        data.to_pickle(file_name)
@@ -0,0 +1,73 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Code to test the functions that create our main dataframe.
+from cse163_utils import assert_equals
+from creating_dataframe import stream_school_frame, update_dataframe
+import data_cleaning as dc
+import pandas as pd
+
+
+def test_stream_school_frame():
+    """
+    This function tests that stream_school_frame gives the same output as
+    get_school_frame.
+    """
+    print("Testing stream_school_frame")
+    for file_name, prefix_len, suffix_len in [("test.csv", 1, 1),
+                                              ("test2.csv", 2, 3)]:
+        test_df = pd.read_csv(file_name)
+        names = dc.get_school_names(test_df, prefix_len, suffix_len)
+        expected = dc.get_school_frame(test_df, names, "test_stat")
+        for chunk_size in [1, 2, 100]:
+            received = stream_school_frame(file_name, prefix_len,
+                                           suffix_len, "test_stat",
+                                           chunk_size=chunk_size, header=0)
+            assert_equals(expected, received)
+
+
+def test_update_dataframe():
+    """
+    This function tests the update_dataframe function for correct output.
+    """
+    print("Testing update_dataframe")
+    data = dc.optimize_dtypes(pd.DataFrame({
+        "Year": [2001, 2002, 2001],
+        "School": ["A", "A", "B"],
+        "applicants": [100.0, 200.0, 50.0],
+        "admitted": [50.0, 100.0, 25.0],
+        "percent_accepted": [50.0, 50.0, 50.0]}))
+    new_rows = pd.DataFrame({"Year": [2002, 2003],
+                             "School": ["A", "B"],
+                             "applicants": [400.0, 10.0],
+                             "admitted": [None, 1.0]})
+    updated, old_rows, changed = update_dataframe(data, new_rows)
+
+    # A 2002 keeps its admitted count, and B 2003 is added in order
+    assert_equals(["A", "A", "B", "B"], list(updated["School"]))
+    assert_equals([2001, 2002, 2001, 2003], list(updated["Year"]))
+    assert_equals([100, 400, 50, 10], list(updated["applicants"]))
+    assert_equals([50.0, 25.0, 50.0, 10.0],
+                  list(updated["percent_accepted"]))
+    assert_equals([2002], list(old_rows["Year"]))
+    assert_equals([25.0, 10.0], list(changed["percent_accepted"]))
+    # The original dataframe is not modified
+    assert_equals([100, 200, 50], list(data["applicants"]))
+
+    # Test a new school between the others and a value too big for int16
+    new_rows2 = pd.DataFrame({"Year": [2001], "School": ["AB"],
+                              "applicants": [100000.0]})
+    updated = update_dataframe(data, new_rows2)[0]
+    assert_equals(["A", "A", "AB", "B"], list(updated["School"]))
+    assert_equals([100, 200, 100000, 50], list(updated["applicants"]))
+    assert_equals("Int32", str(updated["applicants"].dtype))
+
+
+def main():
+    """
+    This function calls all test functions.
+    """
+    test_stream_school_frame()
+    test_update_dataframe()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Code to test the DataFrame and array checks in cse163_utils.
+from cse163_utils import assert_equals, check_approx_equals, get_frame_diff
+import numpy as np
+import pandas as pd
+
+
+def test_check_approx_equals():
+    """
+    This function tests the check_approx_equals function on DataFrames and
+    arrays for correct output.
+    """
+    print("Testing check_approx_equals")
+    expected = pd.DataFrame({"Year": [2001, 2002],
+                             "School": ["School 1", "School 1"],
+                             "rate": [50.0, None]})
+    # Test approximately equal values, dtypes, and missing values
+    received = pd.DataFrame({"Year": [2001, 2002],
+                             "School": pd.Categorical(["School 1",
+                                                       "School 1"]),
+                             "rate": [50.0001, np.nan]})
+    assert_equals(True, check_approx_equals(expected, received))
+    changed = received.assign(rate=[50.1, None])
+    assert_equals(False, check_approx_equals(expected, changed))
+    assert_equals(False, check_approx_equals(expected,
+                                             received[["Year", "School"]]))
+    assert_equals(False, check_approx_equals(expected,
+                                             expected.to_dict("records")))
+
+    # Test arrays
+    assert_equals(True, check_approx_equals(np.array([1.0, np.nan]),
+                                            np.array([1.0001, np.nan])))
+    assert_equals(False, check_approx_equals(np.zeros((2, 2)),
+                                             np.zeros(4)))
+
+
+def test_get_frame_diff():
+    """
+    This function tests the get_frame_diff function for correct output.
+    """
+    print("Testing get_frame_diff")
+    expected = pd.DataFrame({"Year": [2001, 2002, 2003],
+                             "School": ["School 1", "School 1", "School 2"],
+                             "rate": [50.0, 60.0, 70.0]})
+    received = expected.assign(rate=[50.0, 61.0, 72.0])
+    assert_equals("2 cells differ:\n"
+                  "  (School 1, 2002) rate: expected 60.0, received 61.0\n"
+                  "  ... and 1 more",
+                  get_frame_diff(expected, received, limit=1))
+    assert_equals("row counts differ: expected 3, received 2",
+                  get_frame_diff(expected, received.iloc[:2]))
+
+
+def main():
+    """
+    This function calls all test functions.
+    """
+    test_check_approx_equals()
+    test_get_frame_diff()
+
+
+if __name__ == "__main__":
+    main()
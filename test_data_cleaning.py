@@ -51,12 +51,118 @@ def test_get_school_data():
                 {"Year": 3, "School": "School 3", stat: 1}]
 
 
+def test_get_school_frame():
+    """
+    This function tests the get_school_frame function for correct output.
+    """
+    print("Testing get_school_frame")
+    # Test that it matches the list of dictionaries from get_school_data
+    test_df = pd.read_csv("test.csv")
+    names = dc.get_school_names(test_df, 1, 1)
+    stat = "test_stat"
+    received = dc.get_school_frame(test_df, names, stat)
+    assert_equals(["Year", "School", stat], list(received.columns))
+    assert_equals(dc.get_school_data(test_df, names, stat),
+                  received.to_dict("records"))
+
+    # Test row order is by year, then by school
+    assert_equals([1, 1, 1, 2, 2, 2, 3, 3, 3], list(received["Year"]))
+    assert_equals(["School 1", "School 2", "School 3"] * 3,
+                  list(received["School"]))
+    assert_equals([5, 4, 3, 7, 5, 4, 6, 2, 1], list(received[stat]))
+
+
+def test_get_school_ids():
+    """
+    This function tests the get_school_ids and get_names_from_ids functions
+    for correct output.
+    """
+    print("Testing get_school_ids")
+    # Test that names keep the same ID
+    ids = dc.get_school_ids(["School A", "School B"])
+    assert_equals(list(ids), list(dc.get_school_ids(["School A",
+                                                     "School B"])))
+    assert_equals(True, ids[0] != ids[1])
+
+    # Test repeated names and mapping back to names
+    received = dc.get_school_id_column(["School B", "School A", "School B"])
+    assert_equals([ids[1], ids[0], ids[1]], list(received))
+    assert_equals(["School B", "School A", "School B"],
+                  list(dc.get_names_from_ids(received)))
+
+
+def test_get_category_mask():
+    """
+    This function tests the get_category_mask function for correct output.
+    """
+    print("Testing get_category_mask")
+    categories = pd.Index(["School 1", "School 2", "School 3"])
+    received = dc.get_category_mask(categories, ["School 3", "School 1",
+                                                 "Unknown School"])
+    assert_equals([True, False, True], list(received))
+    # Test that unknown names are not given school IDs
+    assert_equals(False, "Unknown School" in dc._school_ids)
+
+
+def test_optimize_dtypes():
+    """
+    This function tests the optimize_dtypes function for correct output.
+    """
+    print("Testing optimize_dtypes")
+    test_df = pd.DataFrame({"Year": [2001, 2002, 2003],
+                            "School": ["School 1", "School 2", "School 1"],
+                            "count": [5.0, None, 40000.0],
+                            "rate": [78.36, 55.5, None],
+                            "half": [78.5, 55.25, None],
+                            "tiny": [1e-50, 0.5, 2.0],
+                            "ratio": [100 / 3, 64.0625, 200 / 3]})
+    received = dc.optimize_dtypes(test_df)
+    assert_equals("int16", str(received["Year"].dtype))
+    assert_equals("category", str(received["School"].dtype))
+    assert_equals("Int32", str(received["count"].dtype))
+    assert_equals("float32", str(received["half"].dtype))
+
+    # Test that values too small for float32 are kept as they are
+    assert_equals("float64", str(received["tiny"].dtype))
+    # Test that values float32 would round are kept as they are
+    assert_equals("float64", str(received["rate"].dtype))
+    assert_equals("float64", str(received["ratio"].dtype))
+    assert_equals([5, 40000], list(received["count"].dropna()))
+    assert_equals(["School 1", "School 2", "School 1"],
+                  list(received["School"]))
+    # Test that no value changed
+    assert_equals(test_df, received)
+
+
+def test_fits_dtype():
+    """
+    This function tests the fits_dtype function for correct output.
+    """
+    print("Testing fits_dtype")
+    # Test values that are stored exactly
+    assert_equals(True, dc.fits_dtype(pd.Series([78.5, None]), "float32"))
+    assert_equals(True, dc.fits_dtype(pd.Series([5.0, None]), "Int16"))
+
+    # Test that precision, range, and missing values are checked
+    assert_equals(False, dc.fits_dtype(pd.Series([78.36]), "float32"))
+    assert_equals(False, dc.fits_dtype(pd.Series([100 / 3]), "float32"))
+    assert_equals(True, dc.fits_dtype(pd.Series([100 / 3]), "float64"))
+    assert_equals(False, dc.fits_dtype(pd.Series([5.5]), "Int16"))
+    assert_equals(False, dc.fits_dtype(pd.Series([40000.0]), "Int16"))
+    assert_equals(False, dc.fits_dtype(pd.Series([5.0, None]), "int16"))
+
+
 def main():
     """
     This function calls all test functions.
     """
     test_get_school_names()
     test_get_school_data()
+    test_get_school_frame()
+    test_get_school_ids()
+    test_get_category_mask()
+    test_optimize_dtypes()
+    test_fits_dtype()
 
 
 if __name__ == "__main__":
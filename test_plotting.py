@@ -0,0 +1,129 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Code to test the cached per-school statistics used by our
+#              plots against computing them directly.
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+
+from cse163_utils import assert_equals
+import data_cleaning as dc
+import pandas as pd
+import plotting
+
+
+def get_test_data():
+    """
+    Returns a small merged DataFrame in the format of create_dataframe.
+    """
+    return dc.optimize_dtypes(pd.DataFrame({
+        "Year": [2001, 2002, 2003, 2001, 2002, 2001, 2002, 2003, 2001],
+        "School": ["School A", "School A", "School A", "School B",
+                   "School B", "School C", "School C", "School C",
+                   "University of Washington-Tacoma Campus"],
+        "grad_rate": [50.5, 60.0, None, 70.0, 75.0, 40.0, 45.5, 42.0, 60.0],
+        "percent_accepted": [80.0, None, 70.0, 60.0, 65.0, 90.0, 85.0,
+                             None, 50.0]}))
+
+
+def check_school_stats(data):
+    """
+    Checks the cached statistics of data, and filter_sufficient_data and
+    get_mean_data on data, against computing them with groupby.
+    """
+    expected = data.groupby("School", observed=True)[["grad_rate",
+                                                      "percent_accepted"]]
+    assert_equals(expected.count().reset_index(drop=True),
+                  plotting.get_school_stats(data).xs(
+                      "count", axis=1, level=1).reset_index(drop=True))
+
+    counts = expected.count()["percent_accepted"]
+    enough = counts.index[counts >= 2]
+    expected_filtered = data.loc[data["School"].isin(enough),
+                                 ["Year", "School", "grad_rate",
+                                  "percent_accepted"]].dropna()
+    assert_equals(expected_filtered,
+                  plotting.filter_sufficient_data(data, "percent_accepted",
+                                                  2))
+
+    expected_means = expected.mean()[["percent_accepted", "grad_rate"]]
+    assert_equals(expected_means.reset_index(),
+                  plotting.get_mean_data(data, "percent_accepted"))
+
+
+def test_school_stats():
+    """
+    This function tests the cached per-school statistics for the full data
+    and a filter_schools subset.
+    """
+    print("Testing school stats")
+    data = get_test_data()
+    check_school_stats(data)
+
+    # The subset is given the statistics of data for its schools
+    subset = plotting.filter_schools(data, ["School A", "School C",
+                                            "University of Washington-"
+                                            "Tacoma Campus"])
+    assert_equals(["School A", "School C"],
+                  list(plotting.get_school_stats(subset).index))
+    assert_equals(["School A"] * 3 + ["School C"] * 3,
+                  list(subset["School"]))
+    check_school_stats(subset)
+
+    # Test that schools left only as unused categories have no statistics
+    without_b = data[data["School"] != "School B"]
+    assert_equals(["School A", "School C",
+                   "University of Washington-Tacoma Campus"],
+                  list(plotting.get_school_stats(without_b).index))
+    check_school_stats(without_b)
+
+
+def test_skip_plot():
+    """
+    This function tests that plot_generic_graph prints the saved fit summary
+    of an unchanged plot without fitting it again.
+    """
+    print("Testing skipped plots")
+    data = plotting.filter_sufficient_data(get_test_data(),
+                                           "percent_accepted", 0)
+    args = (data, "percent_accepted", ("Test", "Percent Accepted"), (4, 4),
+            "test_plot.png")
+    directory = os.getcwd()
+    fit = plotting.bootstrap_fit
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            plotting.init_plot_style()
+            drawn = io.StringIO()
+            with redirect_stdout(drawn):
+                plotting.render_plots([(plot_test_graph, args)], workers=1)
+
+            # Bootstrapping again would fail
+            plotting.bootstrap_fit = None
+            skipped = io.StringIO()
+            with redirect_stdout(skipped):
+                plotting.render_plots([(plot_test_graph, args)], workers=1)
+        finally:
+            plotting.bootstrap_fit = fit
+            os.chdir(directory)
+    assert_equals(drawn.getvalue(), skipped.getvalue())
+    assert_equals(True, "Test Pearson R: " in skipped.getvalue())
+
+
+def plot_test_graph(args):
+    """
+    Takes in a tuple of the arguments of plot_generic_graph and calls it.
+    """
+    plotting.plot_generic_graph(*args)
+
+
+def main():
+    """
+    This function calls all test functions.
+    """
+    test_school_stats()
+    test_skip_plot()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Code to test the regression functions.
+from cse163_utils import assert_equals
+import regression
+from regression import bootstrap_fit, fit_lines, get_interval
+import pandas as pd
+
+
+def test_fit_lines():
+    """
+    This function tests the fit_lines function for correct output.
+    """
+    print("Testing fit_lines")
+    # Test a single group on a perfect line
+    test_df = pd.DataFrame({"x": [1.0, 2.0, 3.0], "y": [3.0, 5.0, 7.0]})
+    received = fit_lines(test_df, "x", "y").to_dict("records")
+    expected = [{"slope": 2.0, "intercept": 1.0, "r": 1.0, "p_value": 0.0,
+                 "n": 3}]
+    assert_equals(expected, received)
+
+    # Test several groups at once, ignoring missing values
+    test_df2 = pd.DataFrame({"g": ["a", "a", "a", "b", "b", "b", "b"],
+                             "x": [1.0, 2.0, 3.0, 1.0, 2.0, 3.0, 4.0],
+                             "y": [2.0, 1.0, 0.0, 1.0, 3.0, 2.0, None]})
+    received = fit_lines(test_df2, "x", "y", "g")
+    assert_equals([-1.0, 0.5], list(received["slope"]))
+    assert_equals([3.0, 1.0], list(received["intercept"]))
+    assert_equals([-1.0, 0.5], list(received["r"]))
+    assert_equals([3, 3], list(received["n"]))
+    # Matches scipy.stats.pearsonr([1, 2, 3], [1, 3, 2])
+    assert_equals(0.6667, received.loc["b", "p_value"])
+
+    # Test that unused categories are not given groups
+    test_df2["g"] = pd.Categorical(test_df2["g"], categories=["a", "b", "c"])
+    received = fit_lines(test_df2, "x", "y", "g")
+    assert_equals(["a", "b"], list(received.index))
+    assert_equals([3, 3], list(received["n"]))
+
+    # Test that two points are not significant, like scipy.stats.pearsonr
+    test_df3 = pd.DataFrame({"x": [1.0, 2.0], "y": [3.0, 1.0]})
+    received = fit_lines(test_df3, "x", "y").iloc[0]
+    assert_equals(-1.0, received["r"])
+    assert_equals(1.0, received["p_value"])
+
+
+def test_bootstrap_fit():
+    """
+    This function tests the bootstrap_fit function for correct output.
+    """
+    print("Testing bootstrap_fit")
+    # Every resample of points on a line has the same line
+    test_df = pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0],
+                            "y": [3.0, 5.0, 7.0, 9.0]})
+    fits = bootstrap_fit(test_df, "x", "y", num_resamples=500)
+    assert_equals(500, len(fits))
+    assert_equals((2.0, 2.0), get_interval(fits["slope"]))
+    assert_equals((1.0, 1.0), get_interval(fits["r"]))
+
+    # The same seed gives the same resamples
+    test_df2 = pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0, 5.0],
+                             "y": [2.0, 1.0, 4.0, 3.0, None]})
+    first = bootstrap_fit(test_df2, "x", "y", num_resamples=300, seed=1)
+    second = bootstrap_fit(test_df2, "x", "y", num_resamples=300, seed=1)
+    assert_equals(True, first.equals(second))
+    low, high = get_interval(first["slope"])
+    assert_equals(True, low <= 0.6 <= high)
+
+    # Test that batches shrink to fit the values budget
+    budget = regression.BOOTSTRAP_BATCH_VALUES
+    regression.BOOTSTRAP_BATCH_VALUES = 12
+    try:
+        fits = bootstrap_fit(test_df, "x", "y", num_resamples=500)
+    finally:
+        regression.BOOTSTRAP_BATCH_VALUES = budget
+    assert_equals(500, len(fits))
+    assert_equals((2.0, 2.0), get_interval(fits["slope"]))
+
+
+def main():
+    """
+    This function calls all test functions.
+    """
+    test_fit_lines()
+    test_bootstrap_fit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Code to test the school by year matrix export.
+from cse163_utils import assert_equals
+from school_arrays import write_matrix
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+
+
+def test_write_matrix():
+    """
+    This function tests the write_matrix function for correct output.
+    """
+    print("Testing write_matrix")
+    data = pd.DataFrame({"Year": [2002, 2001, 2002],
+                         "School": ["School 2", "School 1", "School 1"],
+                         "rate": [50.0, 60.0, None]})
+    schools = pd.Index(["School 1", "School 2", "School 3"])
+    years = pd.Index([2001, 2002])
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, "rate.npy")
+        write_matrix(file_name, data, "rate", schools, years)
+        assert_equals(["rate.npy"], os.listdir(directory))
+        matrix = np.load(file_name, mmap_mode="r")
+        expected = np.array([[60.0, np.nan], [np.nan, 50.0],
+                             [np.nan, np.nan]])
+        assert_equals(expected, np.asarray(matrix))
+        del matrix
+
+
+def main():
+    """
+    This function calls all test functions.
+    """
+    test_write_matrix()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Code to test the lazy school data query API.
+from cse163_utils import assert_equals
+from school_query import SchoolData
+import pandas as pd
+
+
+def test_school_data():
+    """
+    This function tests that SchoolData queries give the same output as the
+    equivalent eager pandas code.
+    """
+    print("Testing SchoolData")
+    test_df = pd.DataFrame({"School": ["A", "A", "A", "B", "B", "C"],
+                            "Year": [1, 2, 3, 1, 2, 1],
+                            "x": [1.0, None, 3.0, 4.0, 5.0, None],
+                            "y": [2.0, 2.0, None, 1.0, 1.0, 1.0]})
+    query = SchoolData(test_df).select(["School", "x", "y"])
+    query = query.fillna(0).derive("z", lambda c: c["x"] + c["y"])
+    query = query.where(lambda c: c["z"] > 2).min_count("y", 2)
+    received = query.collect()
+
+    expected = test_df[["School", "x", "y"]].fillna(0)
+    expected["z"] = expected["x"] + expected["y"]
+    expected = expected[expected["z"] > 2]
+    expected = expected[expected["School"].isin(["A", "B"])]
+    assert_equals(expected.to_dict("list"), received.to_dict("list"))
+    assert_equals(list(expected.index), list(received.index))
+
+    # Test dropna with and without thresh
+    received = SchoolData(test_df).dropna().collect()
+    assert_equals([0, 3, 4], list(received.index))
+    received = SchoolData(test_df).dropna(thresh=4).collect()
+    assert_equals([0, 3, 4], list(received.index))
+    received = SchoolData(test_df).dropna(thresh=3).collect()
+    assert_equals([0, 1, 2, 3, 4, 5], list(received.index))
+
+
+def main():
+    """
+    This function calls all test functions.
+    """
+    test_school_data()
+
+
+if __name__ == "__main__":
+    main()
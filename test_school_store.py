@@ -0,0 +1,181 @@
+# Name: Adam Klingler and Kayla Perez
+# Description: Code to test saving our main dataframe to the Parquet store
+#              and loading it back.
+from cse163_utils import assert_equals
+import creating_dataframe as cd
+from creating_dataframe import update_dataframe
+import data_cleaning as dc
+import importlib.util
+import os
+import pandas as pd
+import school_store as ss
+import tempfile
+
+
+def get_test_data():
+    """
+    Returns a small merged DataFrame in the format of create_dataframe, with
+    rows sorted by school and then year.
+    """
+    return dc.optimize_dtypes(pd.DataFrame({
+        "Year": [2001, 2002, 2001, 2002, 2001],
+        "School": ["School B", "School B", "School C", "School C",
+                   "School D"],
+        "applicants": [100.0, 200.0, 50.0, None, 80.0],
+        "grad_rate": [50.5, 60.25, 70.0, 80.0, None]}))
+
+
+def has_pyarrow():
+    """
+    Returns whether pyarrow, which the store needs, is installed, printing
+    that the test is skipped if it is not.
+    """
+    if importlib.util.find_spec("pyarrow") is None:
+        print("Skipping, since pyarrow is not installed")
+        return False
+    return True
+
+
+def test_load_store():
+    """
+    This function tests that load_store gives back the DataFrame given to
+    save_store, and only the columns, schools, and years asked for.
+    """
+    print("Testing load_store")
+    if not has_pyarrow():
+        return
+    data = get_test_data()
+    with tempfile.TemporaryDirectory() as directory:
+        store_dir = os.path.join(directory, "store")
+        ss.save_store(data, store_dir)
+        received = ss.load_store(store_dir=store_dir)
+        projected = ss.load_store(["School", "grad_rate"],
+                                  store_dir=store_dir)
+        filtered = ss.load_store(["Year", "School", "applicants"],
+                                 schools=["School C", "School D"],
+                                 years=[2001], store_dir=store_dir)
+
+    # Test the round trip, including the row order
+    assert_equals(data, received)
+    assert_equals(["School B", "School B", "School C", "School C",
+                   "School D"], list(received["School"]))
+    assert_equals([2001, 2002, 2001, 2002, 2001], list(received["Year"]))
+
+    # Test only the given columns are loaded, in the order given
+    assert_equals(data[["School", "grad_rate"]], projected)
+
+    # Test the school and year filters
+    assert_equals(["Year", "School", "applicants"], list(filtered.columns))
+    assert_equals(["School C", "School D"], list(filtered["School"]))
+    assert_equals([2001, 2001], list(filtered["Year"]))
+    assert_equals([50, 80], list(filtered["applicants"]))
+
+
+def test_update_store_rows():
+    """
+    This function tests that update_store_rows gives the same rows as
+    update_dataframe, including for a new school, sorted by school.
+    """
+    print("Testing update_store_rows")
+    if not has_pyarrow():
+        return
+    data = get_test_data()
+    new_rows = pd.DataFrame({"Year": [2002, 2003],
+                             "School": ["School A", "School C"],
+                             "grad_rate": [40.0, 90.0]})
+    with tempfile.TemporaryDirectory() as directory:
+        store_dir = os.path.join(directory, "store")
+        ss.save_store(data, store_dir)
+        ss.update_store_rows(new_rows, store_dir)
+        received = ss.load_store(store_dir=store_dir)
+    expected = update_dataframe(data, new_rows)[0]
+    assert_equals(["School A", "School B", "School B", "School C",
+                   "School C", "School C", "School D"],
+                  list(received["School"]))
+    assert_equals(expected, received)
+
+
+def test_is_store_current():
+    """
+    This function tests that the store is out of date once a dataset's
+    registry entry changes.
+    """
+    print("Testing is_store_current")
+    if not has_pyarrow():
+        return
+    datasets = cd.DATASETS
+    with tempfile.TemporaryDirectory() as directory:
+        store_dir = os.path.join(directory, "store")
+        ss.save_store(get_test_data(), store_dir)
+        assert_equals(True, ss.is_store_current(store_dir))
+        try:
+            cd.DATASETS = [dict(d) for d in datasets]
+            cd.DATASETS[0]["suffix_len"] += 1
+            assert_equals(False, ss.is_store_current(store_dir))
+        finally:
+            cd.DATASETS = datasets
+        assert_equals(True, ss.is_store_current(store_dir))
+
+
+def test_store_rows_after_rebuild():
+    """
+    This function tests that rows added by update_store_rows are added again
+    when the store is rebuilt, until clear_store_rows is called.
+    """
+    print("Testing update_store_rows after a rebuild")
+    if not has_pyarrow():
+        return
+    new_rows = pd.DataFrame({"Year": [2030],
+                             "School": ["Gonzaga University"],
+                             "grad_rate": [75.5]})
+    with tempfile.TemporaryDirectory() as directory:
+        store_dir = os.path.join(directory, "store")
+        ss.update_store(store_dir)
+        ss.update_store_rows(new_rows, store_dir)
+
+        # Pretend a dataset changed, so the store is rebuilt
+        with open(os.path.join(store_dir, ss.SOURCES_FILE), "w") as f:
+            f.write("[]")
+        ss.update_store(store_dir)
+        rebuilt = ss.load_store(["School", "grad_rate"], years=[2030],
+                                store_dir=store_dir)
+        ss.clear_store_rows(store_dir)
+        cleared = ss.load_store(years=[2017, 2030], store_dir=store_dir)
+    assert_equals(["Gonzaga University"], list(rebuilt["School"]))
+    assert_equals([75.5], list(rebuilt["grad_rate"]))
+    assert_equals([2017], list(cleared["Year"].unique()))
+
+
+def test_export_dataframe():
+    """
+    This function tests that export_dataframe rejects an unknown file
+    extension before loading any data.
+    """
+    print("Testing export_dataframe")
+    load = ss.load_dataframe
+    # Loading the data would fail
+    ss.load_dataframe = None
+    try:
+        ss.export_dataframe("out.xlsx")
+        raised = False
+    except ValueError:
+        raised = True
+    finally:
+        ss.load_dataframe = load
+    assert_equals(True, raised)
+    assert_equals(False, os.path.exists("out.xlsx"))
+
+
+def main():
+    """
+    This function calls all test functions.
+    """
+    test_load_store()
+    test_update_store_rows()
+    test_is_store_current()
+    test_store_rows_after_rebuild()
+    test_export_dataframe()
+
+
+if __name__ == "__main__":
+    main()